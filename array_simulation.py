@@ -0,0 +1,236 @@
+"""Structure-of-arrays simulation backend.
+
+Positions, velocities and types live in contiguous NumPy arrays, and
+movement, wall reflection, collision detection and conversion run as
+whole-array operations. For a given seed it produces the same trajectories
+and conversions as the scalar Simulation, so the two are interchangeable
+for headless runs.
+"""
+import math
+
+import numpy as np
+
+from simulation import CODE_TYPES, HEADER_HEIGHT, SWEPT, TYPE_CODES, Simulation
+
+class ArraySimulation(Simulation):
+    """Simulation whose object store is a set of NumPy arrays instead of Python objects"""
+    def __init__(self, *args, **kwargs):
+        self.size = 0  # Number of live objects; arrays may have spare capacity past it
+        self.allocate(0)
+        super().__init__(*args, **kwargs)
+
+    def allocate(self, capacity):
+        self.xs = np.zeros(capacity)
+        self.ys = np.zeros(capacity)
+        self.vel_xs = np.zeros(capacity)
+        self.vel_ys = np.zeros(capacity)
+        self.types = np.zeros(capacity, dtype=np.int8)
+
+    def grow(self, needed):
+        """Make room for `needed` live objects, doubling capacity to amortize copies"""
+        capacity = len(self.xs)
+        if needed <= capacity:
+            return
+        old = (self.xs, self.ys, self.vel_xs, self.vel_ys, self.types)
+        self.allocate(max(needed, capacity * 2, 64))
+        for new_array, old_array in zip((self.xs, self.ys, self.vel_xs, self.vel_ys, self.types), old):
+            new_array[:self.size] = old_array[:self.size]
+
+    @property
+    def radius(self):
+        return self.object_size // 2
+
+    def resize(self, width, height):
+        super().resize(width, height)
+
+        # Keep objects within new bounds
+        r = self.radius
+        n = self.size
+        np.clip(self.xs[:n], r, self.width - r, out=self.xs[:n])
+        np.clip(self.ys[:n], HEADER_HEIGHT + r, self.height - r, out=self.ys[:n])
+
+    def start(self, count=None, seed=None):
+        self.size = 0
+        super().start(count, seed)
+
+    def get_object_arrays(self):
+        n = self.size
+        return (self.types[:n].copy(), self.xs[:n].copy(), self.ys[:n].copy(),
+                self.vel_xs[:n].copy(), self.vel_ys[:n].copy())
+
+    def set_object_arrays(self, codes, xs, ys, vel_xs, vel_ys):
+        self.size = 0
+        n = len(codes)
+        self.grow(n)
+        for target, values in zip((self.types, self.xs, self.ys, self.vel_xs, self.vel_ys), (codes, xs, ys, vel_xs, vel_ys)):
+            target[:n] = values
+        self.size = n
+        population = np.bincount(self.types[:n], minlength=3)
+        self.counts = {obj_type: int(population[code]) for code, obj_type in enumerate(CODE_TYPES)}
+
+    def spawn_batch(self, batch):
+        # Draw from the RNG in the same order as Simulation.add_object so trajectories match
+        self.grow(self.size + len(batch))
+        speed = self.speed_pixels_per_frame
+        for obj_type, x, y in batch:
+            angle = self.rng.uniform(0, 2 * math.pi)
+            i = self.size
+            self.xs[i] = x
+            self.ys[i] = y
+            self.vel_xs[i] = math.cos(angle) * speed
+            self.vel_ys[i] = math.sin(angle) * speed
+            self.types[i] = TYPE_CODES[obj_type]
+            self.size += 1
+            self.counts[obj_type] += 1
+
+    def step(self, dt):
+        """Advance the battle by one tick; `dt` (seconds) drives the spawn timer"""
+        if not self.running:
+            return
+        profiler = self.profiler
+
+        # Spawn objects
+        for batch in self.spawner.due(dt, self):
+            self.spawn_batch(batch)
+        if profiler:
+            profiler.lap("spawn")
+
+        n = self.size
+        r = self.radius
+        xs, ys = self.xs[:n], self.ys[:n]
+        vel_xs, vel_ys = self.vel_xs[:n], self.vel_ys[:n]
+
+        # Integrate and bounce off walls
+        if self.collision_mode == SWEPT:
+            self.start_xs = xs.copy()
+            self.start_ys = ys.copy()
+        xs += vel_xs
+        ys += vel_ys
+        hit_x = (xs - r <= 0) | (xs + r >= self.width)
+        vel_xs[hit_x] = -vel_xs[hit_x]
+        xs[hit_x] = np.clip(xs[hit_x], r, self.width - r)
+        hit_y = (ys - r <= HEADER_HEIGHT) | (ys + r >= self.height)
+        vel_ys[hit_y] = -vel_ys[hit_y]
+        ys[hit_y] = np.clip(ys[hit_y], HEADER_HEIGHT + r, self.height - r)
+        if profiler:
+            profiler.lap("movement")
+
+        # Check collisions and apply conversions
+        first, second = self.find_collisions()
+        if profiler:
+            profiler.lap("collision")
+        types = self.types[:n]
+        if self.collision_mode == SWEPT:
+            # Pairs are in time-of-impact order; resolve them one by one so earlier conversions count
+            codes = types.tolist()
+            counts = self.counts
+            for i, j in zip(first.tolist(), second.tolist()):
+                if (codes[i] - codes[j]) % 3 == 1:
+                    winner, loser = i, j
+                elif (codes[j] - codes[i]) % 3 == 1:
+                    winner, loser = j, i
+                else:
+                    continue
+                counts[CODE_TYPES[codes[loser]]] -= 1
+                counts[CODE_TYPES[codes[winner]]] += 1
+                codes[loser] = codes[winner]
+            types[:] = codes
+        else:
+            # Double-buffered: winners come from the frozen types, conversions land in a fresh buffer.
+            # Only one type beats any given type, so a loser's new type is always its predator's,
+            # however many attackers hit it (see simulation.resolve_conversions).
+            first_types = types[first]
+            second_types = types[second]
+            losers = np.concatenate((second[(first_types - second_types) % 3 == 1],
+                                     first[(second_types - first_types) % 3 == 1]))
+            losers = np.unique(losers)
+
+            # Move converted objects from their old type's counter to their predator's
+            moved = np.bincount(types[losers], minlength=3)
+            for code, obj_type in enumerate(CODE_TYPES):
+                self.counts[obj_type] += int(moved[code - 1]) - int(moved[code])
+
+            next_types = types.copy()
+            next_types[losers] = (types[losers] + 1) % 3
+            self.types[:n] = next_types
+        if profiler:
+            profiler.lap("conversion")
+
+        self.finish_tick()
+
+    def find_collisions(self):
+        """Return colliding (i, j) index arrays, i < j; swept hits are ordered like Simulation.find_collisions"""
+        n = self.size
+        xs, ys = self.xs[:n], self.ys[:n]
+        cell_size = self.broad_phase_cell_size()
+        cell_xs = (xs // cell_size).astype(np.int64)
+        cell_ys = (ys // cell_size).astype(np.int64)
+
+        # Sort objects by a flattened cell key so each neighboring cell is one contiguous run
+        stride = int(cell_ys.max(initial=0)) + 3
+        keys = cell_xs * stride + cell_ys
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        # Search with the sorted keys as targets too: sorted queries walk the array far faster than
+        # scattered ones, and `order` maps each query back to its object
+        firsts, seconds = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                target = sorted_keys + (dx * stride + dy)
+                starts = np.searchsorted(sorted_keys, target, side="left")
+                counts = np.searchsorted(sorted_keys, target, side="right") - starts
+                total = int(counts.sum())
+                if not total:
+                    continue
+                first = np.repeat(order, counts)
+                run_offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                second = order[np.repeat(starts, counts) + run_offsets]
+                keep = first < second
+                firsts.append(first[keep])
+                seconds.append(second[keep])
+
+        if not firsts:
+            self.pairs_tested = self.collisions_found = 0
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+
+        reach = 2 * self.radius
+        self.pairs_tested = len(first)
+        if self.collision_mode == SWEPT:
+            return self.sweep_pairs(first, second, reach)
+
+        # Narrow phase on squared distances; resolution is order-independent so pairs stay unsorted
+        dx = xs[first] - xs[second]
+        dy = ys[first] - ys[second]
+        hit = dx * dx + dy * dy < reach * reach
+        first, second = first[hit], second[hit]
+        self.collisions_found = len(first)
+        return first, second
+
+    def sweep_pairs(self, first, second, reach):
+        """Vectorized time_of_impact over candidate pairs; returns hits ordered by (t, i, j)"""
+        n = self.size
+        start_xs, start_ys = self.start_xs, self.start_ys
+        xs, ys = self.xs[:n], self.ys[:n]
+        x1, y1, x2, y2 = start_xs[first], start_ys[first], start_xs[second], start_ys[second]
+        dx = x1 - x2
+        dy = y1 - y2
+        move_x = (xs[first] - x1) - (xs[second] - x2)
+        move_y = (ys[first] - y1) - (ys[second] - y2)
+
+        c = dx * dx + dy * dy - reach * reach
+        b = 2 * (dx * move_x + dy * move_y)
+        a = move_x * move_x + move_y * move_y
+        discriminant = b * b - 4 * a * c
+        entering = (c >= 0) & (b < 0) & (discriminant >= 0)
+        t = np.full(len(first), np.inf)
+        t[c < 0] = 0.0
+        t[entering] = (-b[entering] - np.sqrt(discriminant[entering])) / (2 * a[entering])
+        hit = t <= 1
+        first, second, t = first[hit], second[hit], t[hit]
+        self.collisions_found = len(first)
+        pair_order = np.lexsort((second, first, t))
+        return first[pair_order], second[pair_order]
@@ -0,0 +1,247 @@
+"""Benchmarks for the simulation and rendering hot paths.
+
+Times a full update tick, the collision check, converting every object and a full
+frame draw at several population sizes, using SDL's dummy video driver so
+no window is needed. Cold start (importing the game through the first
+frame with every sprite drawn) is timed in fresh interpreters, and the heap
+bytes each simulation and game object costs are measured with tracemalloc.
+Results are written as JSON. When a baseline file is
+given, any phase that got slower than the allowed tolerance is reported and
+the run exits with status 1.
+
+Example:
+    python benchmark.py -o bench.json --save-baseline bench_baseline.json
+    python benchmark.py -o bench.json --baseline bench_baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import game
+from simulation import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, HEADER_HEIGHT, OBJECT_SIZE, TICK_SECONDS, ObjectType, SimObject, Simulation,
+)
+
+COUNTS = [10, 50, 200, 1000, 5000]  # Objects per type
+REFERENCE_COUNT = 200  # Arenas grow past this population so density stays at the 200-per-type level
+PHASES = ["update", "collisions", "conversion", "draw"]
+MEMORY_OBJECTS = 30000  # Objects created when measuring bytes per object
+
+# Runs in a fresh interpreter: import -> window -> every sprite ready -> first frame presented
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+import game
+bench_game = game.Game()
+for obj_type in game.ObjectType:
+    game.SPRITE_CACHE.get(obj_type, bench_game.simulation.object_size)
+bench_game.draw()
+print((time.perf_counter() - start) * 1000)
+"""
+
+def arena_size(per_type):
+    scale = max(1.0, math.sqrt(per_type / REFERENCE_COUNT))
+    return int(WINDOW_WIDTH * scale), int(WINDOW_HEIGHT * scale)
+
+def populate(simulation, per_type, seed=0):
+    """Start a battle with `per_type` objects of each type already scattered over the arena"""
+    simulation.start(0, seed)
+    rng = simulation.rng
+    radius = simulation.object_size // 2
+    for _ in range(per_type):
+        for obj_type in ObjectType:
+            x = rng.uniform(radius, simulation.width - radius)
+            y = rng.uniform(HEADER_HEIGHT + radius, simulation.height - radius)
+            simulation.add_object(obj_type, x, y)
+
+def time_call(func, min_time, max_repeats=1000, setup=None):
+    """Return the best per-call time in milliseconds over calls totalling at least `min_time` seconds
+
+    `setup`, if given, runs untimed before every call.
+    """
+    best = math.inf
+    elapsed = 0.0
+    repeats = 0
+    while repeats < max_repeats and (elapsed < min_time or repeats < 3):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        best = min(best, duration)
+        elapsed += duration
+        repeats += 1
+    return best * 1000
+
+def make_game(width, height):
+    bench_game = game.Game()
+    bench_game.screen = pygame.display.set_mode((width, height))
+    bench_game.window_width, bench_game.window_height = width, height
+    bench_game.simulation = Simulation(width, height, object_size=OBJECT_SIZE, object_factory=game.GameObject)
+    bench_game.update_window_dependent_values()
+    return bench_game
+
+def bench_population(per_type, min_time):
+    width, height = arena_size(per_type)
+    bench_game = make_game(width, height)
+    simulation = bench_game.simulation
+    populate(simulation, per_type)
+
+    results = {}
+    results["collisions"] = time_call(simulation.find_collisions, min_time)
+
+    # Convert every object to the next type
+    objects = simulation.objects
+    types = list(ObjectType)
+    def convert_all():
+        for obj in objects:
+            simulation.convert(obj, types[(types.index(obj.type) + 1) % 3])
+    results["conversion"] = time_call(convert_all, min_time)
+
+    def draw():
+        bench_game.needs_redraw = True
+        bench_game.draw()
+    results["draw"] = time_call(draw, min_time)
+
+    # Stepping changes the population (and can end the battle), so every tick starts from the same scatter
+    results["update"] = time_call(lambda: simulation.step(TICK_SECONDS), min_time,
+                                  setup=lambda: populate(simulation, per_type))
+    return results
+
+def bench_cold_start(runs):
+    """Best in-process (import to first frame) and whole-process times in milliseconds over `runs` launches"""
+    first_frame = process = math.inf
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT], capture_output=True, text=True, check=True).stdout
+        process = min(process, (time.perf_counter() - start) * 1000)
+        first_frame = min(first_frame, float(output.split()[-1]))
+    return {"cold_start/first_frame": first_frame, "cold_start/process": process}
+
+class DictObject:
+    """Reference for the memory benchmark: the object layout before SimObject got __slots__
+
+    A per-instance __dict__ holding the ObjectType member, a back-reference to the simulation, and
+    the same position, velocity and radius values.
+    """
+    def __init__(self, obj_type, x, y, radius, vel_x, vel_y, simulation=None):
+        self.type = obj_type
+        self.x = x
+        self.y = y
+        self.simulation = simulation
+        self.radius = radius
+        self.vel_x = vel_x
+        self.vel_y = vel_y
+
+class DictGameObject(DictObject):
+    """The old GameObject layout: DictObject plus a per-object sprite reference"""
+    def __init__(self, obj_type, x, y, radius, vel_x, vel_y, simulation=None):
+        super().__init__(obj_type, x, y, radius, vel_x, vel_y, simulation)
+        self.sprite = None
+
+def bytes_per_object(object_factory, count=MEMORY_OBJECTS):
+    """Average heap bytes one object adds to a battle: the instance, its attribute values and its list slot"""
+    simulation = Simulation(object_factory=object_factory)
+    simulation.start(0, 0)
+    rng = simulation.rng
+    types = list(ObjectType)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        simulation.add_object(types[i % 3], rng.uniform(0, simulation.width), rng.uniform(HEADER_HEIGHT, simulation.height))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / count
+
+def bench_memory():
+    """Bytes per object for the slotted classes and for their dict-backed predecessors"""
+    return {
+        "memory/sim_object": bytes_per_object(SimObject),
+        "memory/game_object": bytes_per_object(game.GameObject),
+        "memory/dict_object": bytes_per_object(DictObject),
+        "memory/dict_game_object": bytes_per_object(DictGameObject),
+    }
+
+def run_benchmarks(counts, min_time, cold_starts=0):
+    results = {}
+    if cold_starts:
+        results.update(bench_cold_start(cold_starts))
+        print(f"cold start: first frame {results['cold_start/first_frame']:.1f} ms, "
+              f"process {results['cold_start/process']:.1f} ms", file=sys.stderr)
+    results.update(bench_memory())
+    print(f"memory: {results['memory/sim_object']:.0f} bytes per simulation object "
+          f"(dict-backed: {results['memory/dict_object']:.0f}), {results['memory/game_object']:.0f} per game object "
+          f"(dict-backed: {results['memory/dict_game_object']:.0f})", file=sys.stderr)
+    for per_type in counts:
+        for phase, ms in bench_population(per_type, min_time).items():
+            results[f"{phase}/{3 * per_type}"] = ms
+        print(f"{3 * per_type} objects: " + ", ".join(f"{phase} {results[f'{phase}/{3 * per_type}']:.3f} ms" for phase in PHASES),
+              file=sys.stderr)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return a message for every benchmark more than `tolerance` (a fraction) slower than the baseline"""
+    regressions = []
+    for name, ms in results.items():
+        base = baseline.get(name)
+        unit = "bytes" if name.startswith("memory/") else "ms"
+        if base and ms > base * (1 + tolerance):
+            regressions.append(f"{name}: {ms:.3f} {unit} vs baseline {base:.3f} {unit} (+{(ms / base - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation and rendering hot paths")
+    parser.add_argument("--counts", type=int, nargs="+", default=COUNTS, help="objects per type")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each phase")
+    parser.add_argument("--cold-starts", type=int, default=5, metavar="RUNS", help="fresh launches timed for startup (0 to skip)")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="fail if any benchmark is slower than in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown over the baseline, as a fraction")
+    parser.add_argument("--save-baseline", help="also write results to this file for future comparisons")
+    args = parser.parse_args(argv)
+
+    # Sprites are loaded relative to the project root; resolve output paths first
+    for name in ("output", "baseline", "save_baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "units": "milliseconds per call; conversion converts the whole population once; cold start is the best launch; memory/* is bytes per object",
+        },
+        "results": run_benchmarks(args.counts, args.min_time, args.cold_starts),
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,39 @@
+import os
+# Keep pygame's import banner off stdout, which headless runs use for JSON results
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
 import pygame
-import random
-import math
+import argparse
+import cProfile
+import itertools
+import json
 import sys
-import os
-from enum import Enum
-from typing import List
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-# Initialize Pygame
-pygame.init()
+import snapshot
+import tournament
+from profiler import PHASES, FrameProfiler
+from replay import FRAMES, NEW_GAME, PAUSE, RESIZE, ReplayReader, ReplayWriter
+from simulation import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, FPS, TICK_SECONDS, HEADER_HEIGHT, INITIAL_OBJECT_COUNT,
+    SPEED_PIXELS_PER_FRAME, CODE_TYPES, CORNERS, DISCRETE, SPAWN_PATTERNS, SWEPT, ObjectType, SimObject, Simulation, make_seed,
+    check_arena,
+)
+from tournament import positive_int
 
 # Constants
-WINDOW_WIDTH = 1024
-WINDOW_HEIGHT = 768
 MIN_WINDOW_WIDTH = 800
 MIN_WINDOW_HEIGHT = 600
-FPS = 60
-OBJECT_SIZE_RATIO = 1/15  # Objects are 1/15 of screen size
-OBJECT_SIZE = int(min(WINDOW_WIDTH, WINDOW_HEIGHT) * OBJECT_SIZE_RATIO)  # Default size
-SPAWN_INTERVAL = 0.1  # seconds
-SPEED_INCHES_PER_SEC = 2
-DPI = 96  # Standard screen DPI
-SPEED_PIXELS_PER_FRAME = (SPEED_INCHES_PER_SEC * DPI) / FPS  # Default speed
-INITIAL_OBJECT_COUNT = 50
+MAX_CATCH_UP_STEPS = 5  # Simulation ticks allowed per rendered frame before dropping the backlog
+RESIZE_SETTLE_MS = 100  # A window drag is applied once no further resize event arrived for this long
+
+# Command-line exit statuses (argparse itself exits with 2 on bad arguments)
+EXIT_OK = 0
+EXIT_UNDECIDED = 1  # A headless battle reached --max-ticks without a winner
+EXIT_ERROR = 3  # Anything unexpected: a crashed worker, an unreadable snapshot, ...
+EXIT_INTERRUPTED = 130
+PROGRESS_WIDTH = 60  # Progress lines on stderr are padded so a shorter one overwrites a longer one
 
 # Colors
 BLACK = (0, 0, 0)
@@ -33,88 +45,115 @@ RED = (255, 100, 100)
 GREEN = (100, 255, 100)
 BLUE = (100, 100, 255)
 
-class ObjectType(Enum):
-    ROCK = "rock"
-    PAPER = "paper"
-    SCISSORS = "scissors"
+def init_pygame():
+    """Start only the subsystems the game uses (no audio, joystick, ...); safe to call more than once"""
+    pygame.display.init()
+    pygame.font.init()
 
-class GameObject:
-    def __init__(self, obj_type: ObjectType, x: float, y: float, game_instance=None):
-        self.type = obj_type
-        self.x = x
-        self.y = y
-        self.game = game_instance
-        self.radius = (game_instance.object_size if game_instance else OBJECT_SIZE) // 2
-        
-        # Random direction for movement
-        angle = random.uniform(0, 2 * math.pi)
-        speed = (game_instance.speed_pixels_per_frame if game_instance else SPEED_PIXELS_PER_FRAME)
-        self.vel_x = math.cos(angle) * speed
-        self.vel_y = math.sin(angle) * speed
-        
-        # Load sprite
-        self.sprite = self.load_sprite()
-        
-    def load_sprite(self):
-        object_size = (self.game.object_size if self.game else OBJECT_SIZE)
-        sprite_path = f"assets/sprites/{self.type.value}.png"
-        if os.path.exists(sprite_path):
-            sprite = pygame.image.load(sprite_path)
-            return pygame.transform.scale(sprite, (object_size, object_size))
-        else:
+class SpriteCache:
+    """Process-wide sprite atlas: each PNG is decoded once, scaled surfaces are kept per (type, size)
+    
+    preload() decodes and scales on a background thread pool; get() collects the result, and only
+    the display-format conversion (which needs the window) runs on the main thread.
+    """
+    def __init__(self, workers=len(ObjectType)):
+        self.masters = {}  # ObjectType -> decoded surface, or None if the file is missing
+        self.scaled = {}   # (ObjectType, size) -> surface ready to blit
+        self.pending = {}  # (ObjectType, size) -> Future of the scaled, unconverted surface
+        self.workers = workers
+        self.executor = None
+        self.label_font = None
+    
+    def get(self, obj_type: ObjectType, size: int):
+        key = (obj_type, size)
+        sprite = self.scaled.get(key)
+        if sprite is None:
+            future = self.pending.pop(key, None)
+            sprite = future.result() if future else self.scale_sprite(obj_type, size)
+            sprite = self.scaled[key] = self.finish_sprite(obj_type, size, sprite)
+        return sprite
+    
+    def ready(self, obj_type: ObjectType, size: int):
+        """Whether get() would return without waiting on a background decode"""
+        future = self.pending.get((obj_type, size))
+        return future is None or future.done()
+    
+    def preload(self, size: int):
+        """Start decoding and scaling every type's sprite at `size` without waiting for it"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sprites")
+        for obj_type in ObjectType:
+            key = (obj_type, size)
+            if key not in self.scaled and key not in self.pending:
+                self.pending[key] = self.executor.submit(self.scale_sprite, obj_type, size)
+    
+    def set_size(self, size: int):
+        """Drop scaled surfaces (and queued work) for any size other than the current one"""
+        self.scaled = {key: sprite for key, sprite in self.scaled.items() if key[1] == size}
+        for key in [key for key in self.pending if key[1] != size]:
+            self.pending.pop(key).cancel()
+    
+    def load_master(self, obj_type: ObjectType):
+        if obj_type not in self.masters:
+            sprite_path = f"assets/sprites/{obj_type.value}.png"
+            self.masters[obj_type] = pygame.image.load(sprite_path) if os.path.exists(sprite_path) else None
+        return self.masters[obj_type]
+    
+    def scale_sprite(self, obj_type: ObjectType, size: int):
+        """Decode (once) and scale; runs on worker threads, so it must not touch the display or fonts"""
+        master = self.load_master(obj_type)
+        return pygame.transform.scale(master, (size, size)) if master is not None else None
+    
+    def finish_sprite(self, obj_type: ObjectType, size: int, sprite):
+        if sprite is None:
             # Fallback to colored circles if sprites don't exist
-            surface = pygame.Surface((object_size, object_size), pygame.SRCALPHA)
+            radius = size // 2
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
             color = {
                 ObjectType.ROCK: (100, 100, 100),
                 ObjectType.PAPER: (255, 255, 255),
                 ObjectType.SCISSORS: (255, 100, 100)
-            }[self.type]
-            pygame.draw.circle(surface, color, (self.radius, self.radius), self.radius)
+            }[obj_type]
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
             
             # Add simple text label for clarity
-            font = pygame.font.Font(None, 16)
-            text = font.render(self.type.value[0].upper(), True, BLACK)
-            text_rect = text.get_rect(center=(self.radius, self.radius))
-            surface.blit(text, text_rect)
-            
-            return surface
-    
-    def update(self):
-        self.x += self.vel_x
-        self.y += self.vel_y
-        
-        # Get current window dimensions
-        window_width = self.game.window_width if self.game else WINDOW_WIDTH
-        window_height = self.game.window_height if self.game else WINDOW_HEIGHT
-        
-        # Bounce off walls
-        if self.x - self.radius <= 0 or self.x + self.radius >= window_width:
-            self.vel_x = -self.vel_x
-            self.x = max(self.radius, min(window_width - self.radius, self.x))
-            
-        if self.y - self.radius <= 100 or self.y + self.radius >= window_height:  # 100px for UI space
-            self.vel_y = -self.vel_y
-            self.y = max(100 + self.radius, min(window_height - self.radius, self.y))
-    
-    def draw(self, screen):
-        screen.blit(self.sprite, (self.x - self.radius, self.y - self.radius))
-    
-    def get_distance(self, other):
-        return math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
-    
-    def collides_with(self, other):
-        return self.get_distance(other) < (self.radius + other.radius)
+            if self.label_font is None:
+                self.label_font = pygame.font.Font(None, 16)
+            text = self.label_font.render(obj_type.value[0].upper(), True, BLACK)
+            text_rect = text.get_rect(center=(radius, radius))
+            sprite.blit(text, text_rect)
+        
+        # Match the display pixel format once so blits don't convert every frame
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite
+
+SPRITE_CACHE = SpriteCache()
+
+class GameObject(SimObject):
+    """Simulation object as the Game creates it; draw_objects blits the sprite shared by its type"""
+    __slots__ = ()
+
+class TextLabel:
+    """Rendered text surface that is only re-rendered when its string changes"""
+    def __init__(self, font, color):
+        self.font = font
+        self.color = color
+        self.text = None
+        self.surface = None
     
-    def convert_to_type(self, new_type: ObjectType):
-        """Convert this object to a different type, keeping position and velocity"""
-        self.type = new_type
-        self.sprite = self.load_sprite()
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.surface = self.font.render(text, True, self.color)
+        return self.surface
 
 class Button:
     def __init__(self, x, y, width, height, text, font):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.font = font
+        self.label = TextLabel(font, BLACK)
         self.pressed = False
         
     def draw(self, screen):
@@ -122,7 +161,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect)
         pygame.draw.rect(screen, DARK_GRAY, self.rect, 2)
         
-        text_surf = self.font.render(self.text, True, BLACK)
+        text_surf = self.label.render(self.text)
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_surf, text_rect)
     
@@ -205,13 +244,14 @@ class NumberControl:
         self.min_val = min_val
         self.max_val = max_val
         self.font = font
+        self.text_label = TextLabel(font, WHITE)
         
         button_size = 22
         self.up_button = ArrowButton(x + 160, y, button_size, button_size, "up", font)
         self.down_button = ArrowButton(x + 160, y + button_size + 2, button_size, button_size, "down", font)
     
     def draw(self, screen):
-        label_surf = self.font.render(f"{self.label}: {self.value}", True, WHITE)
+        label_surf = self.text_label.render(f"{self.label}: {self.value}")
         screen.blit(label_surf, (self.x, self.y + 8))
         
         self.up_button.draw(screen)
@@ -227,27 +267,53 @@ class NumberControl:
         return False
 
 class Game:
-    def __init__(self):
+    def __init__(self, record_path=None, dirty_rects=False, max_catch_up_steps=MAX_CATCH_UP_STEPS, profile_trace=None,
+                 spawn_pattern=CORNERS, autosave_path=None, autosave_interval=snapshot.AUTOSAVE_SECONDS):
+        init_pygame()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("Rock Paper Scissors Battle")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 24)
         self.big_font = pygame.font.Font(None, 64)
+        self.stats_font = pygame.font.Font(None, 32)  # Larger font for stats
+        
+        # Cached text surfaces, re-rendered only when their string changes
+        self.stat_labels = {obj_type: TextLabel(self.stats_font, WHITE) for obj_type in ObjectType}
+        self.banner_label = TextLabel(self.big_font, WHITE)
+        
+        # Performance overlay (F3) and the profiler feeding it
+        self.profiler = FrameProfiler(trace_path=profile_trace)
+        self.show_perf_overlay = False
+        self.perf_font = pygame.font.Font(None, 18)
+        self.perf_labels = [TextLabel(self.perf_font, GREEN), TextLabel(self.perf_font, GREEN)]
+        self.perf_lines = ["", ""]
+        self.perf_refreshed_at = 0
+        
+        # Rendering state; dirty-rect mode pushes only changed regions, full redraw flips the whole screen
+        self.dirty_rects = dirty_rects
+        self.needs_redraw = True
+        self.full_redraw_needed = True
+        self.object_rects = []
+        self.header_state = None
+        self.overlay_state = None
         
         # Current window dimensions (will be updated on resize)
         self.window_width = WINDOW_WIDTH
         self.window_height = WINDOW_HEIGHT
         self.is_fullscreen = False
+        self.pending_resize = None  # Latest size from a window drag that hasn't settled yet
+        self.resize_requested_at = 0
+        
+        # Fixed-timestep loop state: real time not yet simulated, and the per-frame cap on catch-up ticks
+        self.accumulator = 0.0
+        self.max_catch_up_steps = max_catch_up_steps
         
         # Game state (initialize before calling update_window_dependent_values)
-        self.objects: List[GameObject] = []
-        self.game_running = False
+        self.simulation = Simulation(self.window_width, self.window_height, object_factory=GameObject,
+                                     spawn_pattern=spawn_pattern)
         self.game_paused = False
-        self.winner = None
-        self.spawn_timer = 0
-        self.objects_to_spawn = []
         
-        # Recalculate dynamic values (after objects list is initialized)
+        # Recalculate dynamic values (after the simulation is created)
         self.update_window_dependent_values()
         
         # UI Controls - repositioned for better layout
@@ -259,19 +325,31 @@ class Game:
         button_margin = 10
         self.new_game_button = Button(self.window_width - button_width - 20, 15, button_width, button_height, "New Game", self.font)
         self.pause_button = Button(self.window_width - button_width - 20, 15 + button_height + button_margin, button_width, button_height, "Pause", self.font)
+        
+        # Optional replay recording of every input that affects the simulation
+        self.recorder = None
+        if record_path:
+            self.recorder = ReplayWriter(record_path, self.window_width, self.window_height,
+                                         self.simulation.speed_pixels_per_frame, self.simulation.fixed_object_size,
+                                         spawn_pattern)
+        
+        # Optional periodic snapshots of the battle, written off the frame loop
+        self.autosaver = snapshot.Autosaver(autosave_path, autosave_interval) if autosave_path else None
     
     def update_window_dependent_values(self):
         """Update values that depend on window size"""
-        self.object_size = int(min(self.window_width, self.window_height) * OBJECT_SIZE_RATIO)
-        self.speed_pixels_per_frame = (SPEED_INCHES_PER_SEC * DPI) / FPS
+        # Resizes the arena and clamps objects into the new bounds in one pass
+        self.simulation.resize(self.window_width, self.window_height)
         
         # Update button positions for new window size
         self.update_ui_positions()
         
-        # Update all existing objects' sprites to new size
-        for obj in self.objects:
-            obj.radius = self.object_size // 2
-            obj.sprite = obj.load_sprite()
+        self.needs_redraw = True
+        self.full_redraw_needed = True
+        
+        # Rescale the three sprites once for the new size; every object shares them
+        SPRITE_CACHE.set_size(self.simulation.object_size)
+        SPRITE_CACHE.preload(self.simulation.object_size)
     
     def update_ui_positions(self):
         """Update UI element positions based on current window size"""
@@ -291,6 +369,7 @@ class Game:
     def toggle_fullscreen(self):
         """Toggle between fullscreen and windowed mode"""
         self.is_fullscreen = not self.is_fullscreen
+        self.pending_resize = None
         if self.is_fullscreen:
             self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
         else:
@@ -299,9 +378,24 @@ class Game:
         # Update window dimensions
         self.window_width, self.window_height = self.screen.get_size()
         self.update_window_dependent_values()
+        if self.recorder:
+            self.recorder.resize(self.window_width, self.window_height)
+    
+    def request_resize(self, new_width, new_height):
+        """Note a window resize event; a drag fires many of these, so only the last one is applied"""
+        self.pending_resize = (new_width, new_height)
+        self.resize_requested_at = pygame.time.get_ticks()
+        self.needs_redraw = True
+        self.full_redraw_needed = True
+    
+    def apply_pending_resize(self):
+        """Apply the latest requested size once the window has stopped changing for RESIZE_SETTLE_MS"""
+        if self.pending_resize and pygame.time.get_ticks() - self.resize_requested_at >= RESIZE_SETTLE_MS:
+            self.handle_resize(*self.pending_resize)
+            self.pending_resize = None
     
     def handle_resize(self, new_width, new_height):
-        """Handle window resize event"""
+        """Resize the arena and UI immediately"""
         # Enforce minimum window size
         new_width = max(MIN_WINDOW_WIDTH, new_width)
         new_height = max(MIN_WINDOW_HEIGHT, new_height)
@@ -309,155 +403,191 @@ class Game:
         self.window_width = new_width
         self.window_height = new_height
         self.update_window_dependent_values()
-        
-        # Keep objects within new bounds
-        for obj in self.objects:
-            obj.x = max(obj.radius, min(self.window_width - obj.radius, obj.x))
-            obj.y = max(100 + obj.radius, min(self.window_height - obj.radius, obj.y))
+        if self.recorder:
+            self.recorder.resize(self.window_width, self.window_height)
     
-    def start_new_game(self):
-        self.objects.clear()
-        self.objects_to_spawn.clear()
-        self.game_running = True
+    def start_new_game(self, count=None, seed=None):
         self.game_paused = False
-        self.winner = None
-        self.spawn_timer = 0
         
         # Update pause button text
         self.pause_button.text = "Pause"
         
-        count = self.object_count_control.value
-        
-        # Create spawn queue - spawn from different corners using current window size
-        spawn_positions = [
-            (ObjectType.SCISSORS, 50, self.window_height - 50),  # Bottom left
-            (ObjectType.PAPER, self.window_width - 50, self.window_height - 50),  # Bottom right
-            (ObjectType.ROCK, self.window_width - 50, 130),  # Top right (below header)
-        ]
-        
-        # Create spawn batches - each batch contains one of each type
-        for i in range(count):
-            batch = []
-            for obj_type, base_x, base_y in spawn_positions:
-                # Add small random offset to prevent overlap
-                x = base_x + random.randint(-30, 30)
-                y = base_y + random.randint(-30, 30)
-                # Ensure objects stay within bounds using current window size
-                x = max(self.object_size, min(self.window_width - self.object_size, x))
-                y = max(120, min(self.window_height - self.object_size, y))
-                batch.append((obj_type, x, y))
-            
-            # Shuffle the order within each batch for visual variety
-            random.shuffle(batch)
-            self.objects_to_spawn.append(batch)
+        # Every battle gets its own seed so it can be replayed exactly
+        count = self.object_count_control.value if count is None else count
+        seed = make_seed() if seed is None else seed
+        self.simulation.start(count, seed)
+        self.needs_redraw = True
+        if self.recorder:
+            self.recorder.new_game(count, seed)
+    
+    def toggle_pause(self):
+        if self.simulation.running:
+            self.game_paused = not self.game_paused
+            self.pause_button.text = "Resume" if self.game_paused else "Pause"
+            self.needs_redraw = True
+            if self.recorder:
+                self.recorder.pause()
     
     def update(self, dt):
-        if not self.game_running or self.game_paused:
+        if self.recorder:
+            self.recorder.frame(dt)
+        if self.game_paused or not self.simulation.running:
             return
         
-        # Spawn objects
-        if self.objects_to_spawn:
-            self.spawn_timer += dt
-            if self.spawn_timer >= SPAWN_INTERVAL:
-                # Spawn an entire batch (one of each type) simultaneously
-                batch = self.objects_to_spawn.pop(0)
-                for obj_type, x, y in batch:
-                    self.objects.append(GameObject(obj_type, x, y, self))
-                self.spawn_timer = 0
-        
-        # Update objects
-        for obj in self.objects:
-            obj.update()
-        
-        # Check collisions
-        converted_objects = []
-        for i, obj1 in enumerate(self.objects):
-            for j, obj2 in enumerate(self.objects[i+1:], i+1):
-                if obj1.collides_with(obj2):
-                    winner_obj, loser_idx = self.determine_winner(obj1, obj2, i, j)
-                    if loser_idx is not None:
-                        # Convert the loser to the winner's type
-                        loser_obj = self.objects[loser_idx]
-                        converted_objects.append((loser_idx, winner_obj.type))
-        
-        # Apply conversions
-        for loser_idx, winner_type in converted_objects:
-            if loser_idx < len(self.objects):
-                self.objects[loser_idx].convert_to_type(winner_type)
-        
-        # Check win condition
-        if self.objects and not self.objects_to_spawn:
-            remaining_types = set(obj.type for obj in self.objects)
-            if len(remaining_types) == 1:
-                self.winner = list(remaining_types)[0]
-                self.game_running = False
-    
-    def determine_winner(self, obj1, obj2, idx1, idx2):
-        # Rock beats Scissors, Scissors beats Paper, Paper beats Rock
-        if obj1.type == obj2.type:
-            return obj1, None  # Same type, no winner
-        
-        rules = {
-            (ObjectType.ROCK, ObjectType.SCISSORS): (obj1, idx2),
-            (ObjectType.SCISSORS, ObjectType.PAPER): (obj1, idx2),
-            (ObjectType.PAPER, ObjectType.ROCK): (obj1, idx2),
-            (ObjectType.SCISSORS, ObjectType.ROCK): (obj2, idx1),
-            (ObjectType.PAPER, ObjectType.SCISSORS): (obj2, idx1),
-            (ObjectType.ROCK, ObjectType.PAPER): (obj2, idx1),
-        }
-        
-        return rules.get((obj1.type, obj2.type), (obj1, None))
-    
-    def get_counts(self):
-        counts = {ObjectType.ROCK: 0, ObjectType.PAPER: 0, ObjectType.SCISSORS: 0}
-        for obj in self.objects:
-            counts[obj.type] += 1
-        return counts
+        self.simulation.step(dt)
+        self.needs_redraw = True
     
     def draw(self):
+        # Nothing moves while paused or finished, so only present a frame after an event
+        if (self.game_paused or not self.simulation.running) and not self.needs_redraw:
+            return
+        self.needs_redraw = False
+        
+        if self.dirty_rects:
+            self.draw_dirty()
+        else:
+            self.draw_full()
+            pygame.display.flip()
+    
+    def draw_full(self):
+        """Redraw the whole screen into the back buffer"""
         self.screen.fill(BLACK)
+        self.draw_header()
+        
+        # Draw objects
+        self.object_rects = self.draw_objects()
+        
+        self.draw_overlay()
+    
+    def draw_dirty(self):
+        """Redraw only moved sprites and changed HUD widgets, then push just those regions"""
+        header_state = self.get_header_state()
+        overlay_state = (self.simulation.winner, self.game_paused)
+        if self.full_redraw_needed or overlay_state != self.overlay_state:
+            # Overlays cover arbitrary objects, so showing or hiding one repaints everything
+            self.full_redraw_needed = False
+            self.overlay_state = overlay_state
+            self.header_state = header_state
+            self.draw_full()
+            pygame.display.flip()
+            return
         
+        dirty = []
+        if header_state != self.header_state:
+            self.header_state = header_state
+            self.screen.fill(BLACK, (0, 0, self.window_width, HEADER_HEIGHT))
+            self.draw_header()
+            dirty.append(pygame.Rect(0, 0, self.window_width, HEADER_HEIGHT + 2))
+        
+        # Erase sprites at their old positions, restore the border they may have covered, redraw
+        for rect in self.object_rects:
+            self.screen.fill(BLACK, rect)
+        dirty.extend(self.object_rects)
+        dirty.append(self.draw_border())
+        self.object_rects = self.draw_objects()
+        dirty.extend(self.object_rects)
+        
+        self.draw_overlay()
+        pygame.display.update(dirty)
+    
+    def draw_objects(self):
+        """Blit every object in one Surface.blits call; returns their rects in dirty-rect mode
+
+        Objects are grouped by type so each of the three cached sprites is submitted back to back.
+        A type whose sprite is still being decoded in the background is left out of this frame
+        rather than stalling it.
+        """
+        object_size = self.simulation.object_size
+        radius = object_size // 2
+        positions = [[] for _ in CODE_TYPES]
+        for obj in self.simulation.objects:
+            positions[obj.code].append((int(obj.x) - radius, int(obj.y) - radius))
+        
+        groups = []
+        for obj_type, type_positions in zip(CODE_TYPES, positions):
+            if not type_positions:
+                continue
+            if not SPRITE_CACHE.ready(obj_type, object_size):
+                self.needs_redraw = True  # Draw again once the sprite arrives, even while paused
+                continue
+            groups.append(zip(itertools.repeat(SPRITE_CACHE.get(obj_type, object_size)), type_positions))
+        blit_sequence = itertools.chain.from_iterable(groups)
+        if self.dirty_rects:
+            return self.screen.blits(blit_sequence)
+        self.screen.blits(blit_sequence, doreturn=False)
+        return []
+    
+    def get_header_state(self):
+        """Everything the header shows; the header is repainted only when this changes"""
+        controls = (self.object_count_control.up_button, self.object_count_control.down_button)
+        buttons = (self.new_game_button, self.pause_button)
+        return (tuple(self.simulation.get_counts().values()), self.object_count_control.value,
+                tuple((button.pressed, button.hovered) for button in controls),
+                tuple((button.pressed, button.text) for button in buttons),
+                self.show_perf_overlay and tuple(self.perf_lines))
+    
+    def draw_header(self):
         # Draw UI elements
         self.object_count_control.draw(self.screen)
         self.new_game_button.draw(self.screen)
         self.pause_button.draw(self.screen)
         
         # Draw centered object counts with larger text
-        counts = self.get_counts()
-        stats_font = pygame.font.Font(None, 32)  # Larger font for stats
+        counts = self.simulation.get_counts()
         stats_y = 25
         
         # Calculate total width needed for all stats
-        stat_texts = []
-        stat_widths = []
+        stat_surfs = []
         for obj_type in [ObjectType.ROCK, ObjectType.PAPER, ObjectType.SCISSORS]:
             text = f"{obj_type.value.capitalize()}: {counts[obj_type]}"
-            stat_texts.append(text)
-            text_surf = stats_font.render(text, True, WHITE)
-            stat_widths.append(text_surf.get_width())
+            stat_surfs.append(self.stat_labels[obj_type].render(text))
         
-        total_stats_width = sum(stat_widths) + 60  # 30px spacing between each stat
+        total_stats_width = sum(surf.get_width() for surf in stat_surfs) + 60  # 30px spacing between each stat
         start_x = (self.window_width - total_stats_width) // 2
         
         # Draw each stat centered
         current_x = start_x
-        for i, (text, width) in enumerate(zip(stat_texts, stat_widths)):
-            text_surf = stats_font.render(text, True, WHITE)
+        for text_surf in stat_surfs:
             self.screen.blit(text_surf, (current_x, stats_y))
-            current_x += width + 30  # Move to next position with spacing
-        
-        # Draw game area border (higher to accommodate larger header with stacked buttons)
-        border_y = 100
-        pygame.draw.line(self.screen, WHITE, (0, border_y), (self.window_width, border_y), 2)
+            current_x += text_surf.get_width() + 30  # Move to next position with spacing
         
-        # Draw objects
-        for obj in self.objects:
-            obj.draw(self.screen)
+        if self.show_perf_overlay:
+            self.draw_perf_overlay()
         
+        self.draw_border()
+    
+    def refresh_perf_overlay(self):
+        """Rebuild the overlay text a few times per second so it stays readable"""
+        now = pygame.time.get_ticks()
+        if now - self.perf_refreshed_at < 250:
+            return
+        self.perf_refreshed_at = now
+        
+        profiler = self.profiler
+        simulation = self.simulation
+        self.perf_lines = [
+            f"FPS {self.clock.get_fps():.1f}  frame p50 {profiler.percentile(50):.1f} / p95 {profiler.percentile(95):.1f}"
+            f" / p99 {profiler.percentile(99):.1f} ms  objects {len(simulation.objects)}"
+            f"  pairs {simulation.pairs_tested} / hits {simulation.collisions_found}",
+            "  ".join(f"{phase} {profiler.last_phase_ms[phase]:.2f}" for phase in PHASES) + " ms",
+        ]
+    
+    def draw_perf_overlay(self):
+        # Two small lines centered under the stats, inside the header
+        for i, (label, line) in enumerate(zip(self.perf_labels, self.perf_lines)):
+            text_surf = label.render(line)
+            self.screen.blit(text_surf, text_surf.get_rect(midtop=(self.window_width // 2, 68 + i * 15)))
+    
+    def draw_border(self):
+        # Draw game area border (higher to accommodate larger header with stacked buttons)
+        border_y = HEADER_HEIGHT
+        return pygame.draw.line(self.screen, WHITE, (0, border_y), (self.window_width, border_y), 2)
+    
+    def draw_overlay(self):
         # Draw winner message
-        if self.winner:
-            winner_text = f"{self.winner.value.capitalize()} Wins!"
-            winner_surf = self.big_font.render(winner_text, True, WHITE)
+        if self.simulation.winner:
+            winner_text = f"{self.simulation.winner.value.capitalize()} Wins!"
+            winner_surf = self.banner_label.render(winner_text)
             winner_rect = winner_surf.get_rect(center=(self.window_width // 2, self.window_height // 2))
             
             # Draw background for text
@@ -470,7 +600,7 @@ class Game:
         # Draw pause message
         elif self.game_paused:
             pause_text = "PAUSED"
-            pause_surf = self.big_font.render(pause_text, True, WHITE)
+            pause_surf = self.banner_label.render(pause_text)
             pause_rect = pause_surf.get_rect(center=(self.window_width // 2, self.window_height // 2))
             
             # Draw background for text
@@ -479,21 +609,22 @@ class Game:
             pygame.draw.rect(self.screen, WHITE, bg_rect, 3)
             
             self.screen.blit(pause_surf, pause_rect)
-        
-        pygame.display.flip()
     
     def handle_event(self, event):
+        self.needs_redraw = True
         if event.type == pygame.QUIT:
             return False
         
         # Handle window resize
         elif event.type == pygame.VIDEORESIZE:
-            self.handle_resize(event.w, event.h)
+            self.request_resize(event.w, event.h)
         
         # Handle fullscreen toggle (F11 or Alt+Enter)
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_F11 or (event.key == pygame.K_RETURN and event.mod & pygame.KMOD_ALT):
                 self.toggle_fullscreen()
+            elif event.key == pygame.K_F3:
+                self.show_perf_overlay = not self.show_perf_overlay
         
         # Handle UI events
         if self.object_count_control.handle_event(event):
@@ -503,31 +634,258 @@ class Game:
             self.start_new_game()
         
         if self.pause_button.handle_event(event):
-            if self.game_running and not self.winner:
-                self.game_paused = not self.game_paused
-                self.pause_button.text = "Resume" if self.game_paused else "Pause"
+            self.toggle_pause()
         
         return True
     
+    def advance(self, frame_dt):
+        """Run as many fixed ticks as `frame_dt` seconds of real time call for; returns the tick count
+        
+        Under load this renders fewer frames while keeping simulated time in step with the wall clock.
+        If more than max_catch_up_steps ticks are owed, the backlog is dropped so the loop can't spiral.
+        """
+        self.accumulator += frame_dt
+        steps = 0
+        while self.accumulator >= TICK_SECONDS and steps < self.max_catch_up_steps:
+            self.update(TICK_SECONDS)
+            self.accumulator -= TICK_SECONDS
+            steps += 1
+        if self.accumulator >= TICK_SECONDS:
+            self.accumulator = 0.0
+        return steps
+    
     def run(self):
+        profiler = self.profiler
+        self.simulation.profiler = profiler
         running = True
         while running:
             dt = self.clock.tick(FPS) / 1000.0  # Delta time in seconds
+            profiler.start_frame()
             
             # Handle events
             for event in pygame.event.get():
                 if not self.handle_event(event):
                     running = False
+            self.apply_pending_resize()
+            profiler.lap("events")
             
-            # Update game
-            self.update(dt)
+            # Update game in fixed ticks, independent of the render frame rate
+            self.advance(dt)
             
             # Draw everything
+            if self.show_perf_overlay:
+                self.refresh_perf_overlay()
+                self.needs_redraw = True
+            self.draw()
+            profiler.lap("draw")
+            if self.autosaver and self.simulation.running and not self.game_paused:
+                self.autosaver.maybe_save(self.simulation)
+            profiler.end_frame(dt * 1000, len(self.simulation.objects),
+                               self.simulation.pairs_tested, self.simulation.collisions_found)
+        
+        profiler.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.autosaver:
+            self.autosaver.close(self.simulation, self.game_paused)
+        pygame.quit()
+        sys.exit()
+    
+    def play_replay(self, path, fast_forward_ticks=0):
+        """Play a recorded session on screen; the first `fast_forward_ticks` ticks are simulated without rendering"""
+        reader = ReplayReader(path)
+        self.simulation.speed_pixels_per_frame = reader.speed
+        self.simulation.fixed_object_size = reader.object_size
+        self.simulation.spawn_pattern = reader.spawn_pattern
+        self.apply_replay_resize(reader.width, reader.height)
+        
+        running = True
+        for opcode, *values in reader:
+            if opcode == FRAMES:
+                dt, repeat = values
+                for _ in range(repeat):
+                    self.update(dt)
+                    if self.simulation.ticks < fast_forward_ticks:
+                        continue
+                    self.clock.tick(FPS)
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            running = False
+                    self.draw()
+                    if not running:
+                        break
+            elif opcode == PAUSE:
+                self.toggle_pause()
+            elif opcode == RESIZE:
+                self.apply_replay_resize(*values)
+            elif opcode == NEW_GAME:
+                self.start_new_game(*values)
+            if not running:
+                break
+        reader.close()
+        
+        # Keep the final frame on screen until the window is closed
+        while running:
+            self.clock.tick(FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
             self.draw()
         
         pygame.quit()
         sys.exit()
+    
+    def load_snapshot(self, path):
+        """Resume the battle saved at `path`, at the tick, window size and pause state it was saved with"""
+        paused = snapshot.load(path, self.simulation)
+        self.apply_replay_resize(self.simulation.width, self.simulation.height)
+        self.object_count_control.value = max(self.object_count_control.min_val,
+                                              min(self.object_count_control.max_val, self.simulation.count))
+        self.game_paused = paused
+        self.pause_button.text = "Resume" if paused else "Pause"
+        self.needs_redraw = True
+    
+    def apply_replay_resize(self, width, height):
+        self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+        self.handle_resize(width, height)
+
+def play(args):
+    """Interactive window: the original behaviour"""
+    game = Game(record_path=args.record, dirty_rects=args.dirty_rects, max_catch_up_steps=args.max_catch_up,
+                profile_trace=args.profile_csv, spawn_pattern=args.spawn_pattern,
+                autosave_path=args.autosave, autosave_interval=args.autosave_every)
+    if args.resume:
+        game.load_snapshot(args.resume)
+    session_profile = cProfile.Profile() if args.cprofile else None
+    if session_profile:
+        session_profile.enable()
+    try:
+        if args.replay:
+            game.play_replay(args.replay, args.skip_to)
+        else:
+            game.run()
+    finally:
+        if session_profile:
+            session_profile.disable()
+            session_profile.dump_stats(args.cprofile)
+    return EXIT_OK
+
+def run_headless(args):
+    """One battle without a display; the result row goes to stdout as a JSON line"""
+    params = {
+        "seed": make_seed() if args.seed is None else args.seed, "count": args.count,
+        "width": args.width, "height": args.height, "speed": args.speed, "object_size": args.object_size,
+        "collision_mode": args.collisions, "spawn_pattern": args.spawn_pattern,
+        "max_ticks": args.max_ticks, "backend": args.backend,
+    }
+    
+    def progress(simulation):
+        counts = simulation.get_counts()
+        status = f"tick {simulation.ticks}: " + " ".join(f"{obj_type.value} {counts[obj_type]}" for obj_type in ObjectType)
+        print(f"\r{status:<{PROGRESS_WIDTH}}", end="", file=sys.stderr, flush=True)
+    
+    checkpoint = snapshot.Autosaver(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    row = tournament.run_battle(params, progress if not args.quiet else None, checkpoint, args.resume)
+    if not args.quiet:
+        status = f"{row['winner'] or 'no winner'} after {row['ticks']} ticks"
+        print(f"\r{status:<{PROGRESS_WIDTH}}", file=sys.stderr)
+    print(json.dumps(row), flush=True)
+    return EXIT_OK if row["winner"] else EXIT_UNDECIDED
+
+def run_sweep(args):
+    """Many seeded battles on a process pool; rows stream to stdout (or --output) as they finish"""
+    undecided = 0
+    
+    def progress(done, total, row):
+        nonlocal undecided
+        undecided += row["winner"] is None
+        if not args.quiet:
+            print(f"\r{done}/{total} battles", end="", file=sys.stderr, flush=True)
+    
+    run = tournament.run_tournament(tournament.build_battles(args), args.output, args.workers, args.resume, progress)
+    if not args.quiet:
+        print(f"\n{run} battles, {undecided} without a winner", file=sys.stderr)
+    return EXIT_UNDECIDED if undecided else EXIT_OK
+
+def parse_seed(text):
+    """Seeds are stored as signed 64-bit ints in snapshots"""
+    value = int(text)
+    if not -(1 << 63) <= value < (1 << 63):
+        raise argparse.ArgumentTypeError(f"must fit in a signed 64-bit integer, got {value}")
+    return value
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Rock Paper Scissors Battle",
+        epilog="exit status: 0 on success, 1 if a headless battle hit --max-ticks without a winner, "
+               "2 on bad arguments, 3 on any other error, 130 if interrupted")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    
+    play_parser = commands.add_parser("play", help="open the game window (default)")
+    play_parser.add_argument("--record", metavar="PATH", help="record a replay of this session")
+    play_parser.add_argument("--replay", metavar="PATH", help="play back a recorded session")
+    play_parser.add_argument("--spawn-pattern", choices=SPAWN_PATTERNS, default=CORNERS, help="where new objects enter the arena")
+    play_parser.add_argument("--dirty-rects", action="store_true", help="redraw only changed regions instead of the whole screen")
+    play_parser.add_argument("--max-catch-up", type=int, default=MAX_CATCH_UP_STEPS, metavar="STEPS", help="most simulation ticks run per rendered frame")
+    play_parser.add_argument("--profile-csv", metavar="PATH", help="write per-frame phase timings to a CSV trace")
+    play_parser.add_argument("--cprofile", metavar="PATH", help="run under cProfile and write the .prof file on exit")
+    play_parser.add_argument("--skip-to", type=int, default=0, metavar="TICK", help="fast-forward a replay to this tick without rendering")
+    play_parser.add_argument("--autosave", metavar="PATH", help="snapshot the battle periodically and on exit")
+    play_parser.add_argument("--autosave-every", type=float, default=snapshot.AUTOSAVE_SECONDS, metavar="SECONDS")
+    play_parser.add_argument("--resume", metavar="PATH", help="continue the battle saved in a snapshot")
+    play_parser.set_defaults(handler=play)
+    
+    run_parser = commands.add_parser("run", help="play one battle headless and print its result as JSON")
+    run_parser.add_argument("--seed", type=parse_seed, default=None, help="default: a fresh random seed")
+    run_parser.add_argument("--count", type=positive_int, default=INITIAL_OBJECT_COUNT, help="objects per type")
+    run_parser.add_argument("--width", type=positive_int, default=WINDOW_WIDTH)
+    run_parser.add_argument("--height", type=positive_int, default=WINDOW_HEIGHT)
+    run_parser.add_argument("--speed", type=float, default=SPEED_PIXELS_PER_FRAME, help="pixels per tick")
+    run_parser.add_argument("--object-size", type=positive_int, default=None, help="pixels; default scales with the arena")
+    run_parser.add_argument("--max-ticks", type=positive_int, default=100000, help="give up on the battle after this many ticks")
+    run_parser.add_argument("--collisions", choices=[DISCRETE, SWEPT], default=DISCRETE)
+    run_parser.add_argument("--spawn-pattern", choices=SPAWN_PATTERNS, default=CORNERS)
+    run_parser.add_argument("--backend", choices=["scalar", "array"], default="scalar")
+    run_parser.add_argument("--checkpoint", metavar="PATH", help="snapshot the battle periodically and when it ends")
+    run_parser.add_argument("--checkpoint-every", type=float, default=snapshot.AUTOSAVE_SECONDS, metavar="SECONDS")
+    run_parser.add_argument("--resume", action="store_true", help="continue from --checkpoint if it exists")
+    run_parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    run_parser.set_defaults(handler=run_headless)
+    
+    sweep_parser = commands.add_parser("sweep", help="run a parameter sweep headless, one JSON line per battle")
+    tournament.add_sweep_arguments(sweep_parser)
+    sweep_parser.add_argument("-o", "--output", default=tournament.STDOUT, help=".jsonl or .csv file; default: stdout")
+    sweep_parser.add_argument("--resume", action="store_true", help="skip battles already in the output file")
+    sweep_parser.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    sweep_parser.set_defaults(handler=run_sweep)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Bare `game.py [play options]` keeps working as before
+    if not argv or argv[0] not in ("play", "run", "sweep", "-h", "--help"):
+        argv.insert(0, "play")
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "play" and args.resume and (args.record or args.replay):
+        parser.error("--resume cannot be combined with --record or --replay")
+    if args.command == "run" and args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.command == "run":
+        try:
+            check_arena(args.width, args.height, args.object_size)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "sweep":
+        tournament.check_sweep_arguments(parser, args)
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    except Exception:
+        # Keep crashes distinguishable from the documented statuses above
+        traceback.print_exc()
+        return EXIT_ERROR
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    sys.exit(main())
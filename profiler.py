@@ -0,0 +1,56 @@
+"""Per-phase frame profiler.
+
+Simulation.step and Game.run call lap() after each phase; the time since
+the previous lap is charged to that phase. end_frame() closes the frame,
+keeps a rolling window of frame times for percentiles and, if a trace path
+was given, appends one CSV row per frame.
+"""
+import csv
+import time
+from collections import deque
+
+PHASES = ("events", "spawn", "movement", "collision", "conversion", "draw")
+
+class FrameProfiler:
+    def __init__(self, window=240, trace_path=None):
+        self.frame_times = deque(maxlen=window)  # Milliseconds, most recent frames only
+        self.phase_ms = dict.fromkeys(PHASES, 0.0)  # Frame in progress
+        self.last_phase_ms = dict(self.phase_ms)  # Last completed frame
+        self.frames = 0
+        self.last_lap = time.perf_counter()
+
+        self.trace_file = None
+        if trace_path:
+            self.trace_file = open(trace_path, "w", newline="")
+            self.trace = csv.writer(self.trace_file)
+            self.trace.writerow(["frame", "frame_ms", *(f"{phase}_ms" for phase in PHASES),
+                                 "objects", "pairs_tested", "collisions"])
+
+    def start_frame(self):
+        self.last_lap = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phase_ms[phase] += (now - self.last_lap) * 1000
+        self.last_lap = now
+
+    def end_frame(self, frame_ms, objects=0, pairs_tested=0, collisions=0):
+        self.frames += 1
+        self.frame_times.append(frame_ms)
+        if self.trace_file:
+            self.trace.writerow([self.frames, f"{frame_ms:.3f}", *(f"{self.phase_ms[phase]:.3f}" for phase in PHASES),
+                                 objects, pairs_tested, collisions])
+        self.last_phase_ms = self.phase_ms
+        self.phase_ms = dict.fromkeys(PHASES, 0.0)
+
+    def percentile(self, p):
+        """Frame time (ms) at percentile `p` (0-100) over the rolling window"""
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def close(self):
+        if self.trace_file:
+            self.trace_file.close()
+            self.trace_file = None
@@ -0,0 +1,143 @@
+"""Compact binary replay recording and playback.
+
+A replay is a fixed header (arena size, speed, object size, spawn pattern) followed by a
+stream of records. NEW_GAME carries the object count and RNG seed. FRAMES
+holds a run of identical frame times. PAUSE and RESIZE are the input
+events that change the simulation. Because every battle is fully
+determined by its seed and these inputs, a replay reproduces the original
+session frame for frame, either headless or on screen.
+
+Records are written as they happen. Consecutive frames with the same
+duration are run-length encoded, so memory stays bounded and files stay
+small.
+
+Layout (little-endian):
+    header    "RPSR" u8 version, u16 width, u16 height, f64 speed, i32 object_size (-1: scale with window),
+              u8 spawn pattern (index into simulation.SPAWN_PATTERNS)
+    FRAMES    u8 0x01, f64 dt (seconds), u32 repeat
+    PAUSE     u8 0x02                        (toggles pause)
+    RESIZE    u8 0x03, u16 width, u16 height
+    NEW_GAME  u8 0x04, u32 count, u64 seed
+"""
+import struct
+
+from simulation import CORNERS, SPAWN_PATTERNS, Simulation
+
+MAGIC = b"RPSR"
+VERSION = 2  # 2: lazy spawning draws positions from the RNG as batches come due; exact frame times
+
+HEADER = struct.Struct("<4sBHHdiB")
+FRAMES = 0x01
+PAUSE = 0x02
+RESIZE = 0x03
+NEW_GAME = 0x04
+RECORDS = {
+    FRAMES: struct.Struct("<dI"),
+    PAUSE: struct.Struct("<"),
+    RESIZE: struct.Struct("<HH"),
+    NEW_GAME: struct.Struct("<IQ"),
+}
+MAX_RUN = 0xFFFFFFFF
+
+class ReplayError(Exception):
+    pass
+
+class ReplayWriter:
+    """Streams a session's inputs to disk as they happen"""
+    def __init__(self, path, width, height, speed, object_size=None, spawn_pattern=CORNERS):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, width, height, speed, -1 if object_size is None else object_size,
+                                    SPAWN_PATTERNS.index(spawn_pattern)))
+        self.run_dt = None  # Frame time of the run currently being counted
+        self.run_length = 0
+
+    def frame(self, dt):
+        """Record one frame; `dt` is in seconds and stored exactly so spawn timers replay to the same tick"""
+        if dt != self.run_dt or self.run_length == MAX_RUN:
+            self.flush_run()
+            self.run_dt = dt
+        self.run_length += 1
+
+    def pause(self):
+        self.write_record(PAUSE)
+
+    def resize(self, width, height):
+        self.write_record(RESIZE, width, height)
+
+    def new_game(self, count, seed):
+        self.write_record(NEW_GAME, count, seed)
+
+    def write_record(self, opcode, *values):
+        self.flush_run()
+        self.file.write(bytes((opcode,)) + RECORDS[opcode].pack(*values))
+
+    def flush_run(self):
+        if self.run_length:
+            self.file.write(bytes((FRAMES,)) + RECORDS[FRAMES].pack(self.run_dt, self.run_length))
+            self.run_length = 0
+
+    def close(self):
+        self.flush_run()
+        self.file.close()
+
+class ReplayReader:
+    """Iterates a replay's records without loading the whole file"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        data = self.file.read(HEADER.size)
+        if len(data) < HEADER.size:
+            raise ReplayError(f"{path}: truncated header")
+        magic, version, self.width, self.height, self.speed, object_size, pattern = HEADER.unpack(data)
+        if magic != MAGIC:
+            raise ReplayError(f"{path}: not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"{path}: unsupported replay version {version}")
+        self.object_size = None if object_size < 0 else object_size
+        self.spawn_pattern = SPAWN_PATTERNS[pattern]
+
+    def __iter__(self):
+        """Yield (opcode, *values) tuples; a truncated final record (e.g. after a crash) ends the stream"""
+        while True:
+            opcode = self.file.read(1)
+            if not opcode:
+                return
+            record = RECORDS.get(opcode[0])
+            if record is None:
+                raise ReplayError(f"unknown replay record 0x{opcode[0]:02x}")
+            data = self.file.read(record.size)
+            if len(data) < record.size:
+                return
+            yield (opcode[0],) + record.unpack(data)
+
+    def close(self):
+        self.file.close()
+
+def play_headless(path, simulation_class=Simulation, until_tick=None):
+    """Fast-forward a replay without rendering and return the resulting Simulation
+
+    Stops early once the simulation reaches `until_tick`, e.g. to inspect the state just before a slow stretch.
+    """
+    reader = ReplayReader(path)
+    simulation = simulation_class(reader.width, reader.height, speed=reader.speed, object_size=reader.object_size,
+                                  spawn_pattern=reader.spawn_pattern)
+    paused = False
+    try:
+        for opcode, *values in reader:
+            if opcode == FRAMES:
+                dt, repeat = values
+                if paused:
+                    continue
+                for _ in range(repeat):
+                    if until_tick is not None and simulation.ticks >= until_tick:
+                        return simulation
+                    simulation.step(dt)
+            elif opcode == PAUSE:
+                paused = not paused
+            elif opcode == RESIZE:
+                simulation.resize(*values)
+            elif opcode == NEW_GAME:
+                paused = False
+                simulation.start(*values)
+    finally:
+        reader.close()
+    return simulation
@@ -0,0 +1,543 @@
+"""Headless Rock Paper Scissors battle engine.
+
+Holds the simulation rules (movement, wall bounces, collisions, conversions,
+spawning and win detection) with no dependency on pygame, so battles can be
+run in batch as fast as the CPU allows. game.py renders on top of it.
+"""
+import math
+import random
+from array import array
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional
+
+# Constants
+WINDOW_WIDTH = 1024
+WINDOW_HEIGHT = 768
+FPS = 60
+TICK_SECONDS = 1 / FPS  # Fixed simulation timestep; speeds are expressed per tick
+HEADER_HEIGHT = 100  # Top band reserved for the UI; objects bounce off its bottom edge
+OBJECT_SIZE_RATIO = 1/15  # Objects are 1/15 of screen size
+OBJECT_SIZE = int(min(WINDOW_WIDTH, WINDOW_HEIGHT) * OBJECT_SIZE_RATIO)  # Default size
+SPAWN_INTERVAL = 0.1  # seconds
+SPEED_INCHES_PER_SEC = 2
+DPI = 96  # Standard screen DPI
+SPEED_PIXELS_PER_FRAME = (SPEED_INCHES_PER_SEC * DPI) / FPS  # Default speed
+INITIAL_OBJECT_COUNT = 50
+POPULATION_HISTORY_TICKS = 3600  # Ticks of per-type population kept for plotting (one minute at FPS)
+
+# Spawn patterns: where each type's objects enter the arena
+CORNERS = "corners"
+EDGES = "edges"
+RANDOM = "random"
+SPAWN_PATTERNS = (CORNERS, EDGES, RANDOM)
+
+# Collision modes: test overlap at end-of-tick positions only, or sweep each object along its path through the tick
+DISCRETE = "discrete"
+SWEPT = "swept"
+COLLISION_MODES = (DISCRETE, SWEPT)
+
+def make_seed():
+    """Pick a fresh seed; it is kept on the Simulation so the battle can be reproduced"""
+    return random.randrange(1 << 63)
+
+def check_arena(width, height, object_size=None):
+    """Raise ValueError unless a battle with these settings has room to play out
+
+    Objects need a nonzero size, and the arena must fit one of them beside and below the header.
+    Interactive resizes aren't checked; spawning and bouncing clamp into whatever room is left.
+    """
+    if object_size is None:
+        object_size = int(min(width, height) * OBJECT_SIZE_RATIO)
+        if object_size < 1:
+            raise ValueError(f"a {width}x{height} arena scales objects down to 0 px; "
+                             f"use at least {math.ceil(1 / OBJECT_SIZE_RATIO)} px a side or set an object size")
+    elif object_size < 1:
+        raise ValueError(f"object size must be at least 1, got {object_size}")
+    if width <= object_size:
+        raise ValueError(f"width must exceed the {object_size} px object size, got {width}")
+    if height <= HEADER_HEIGHT + object_size:
+        raise ValueError(f"height must exceed the {HEADER_HEIGHT} px header plus the {object_size} px object size, "
+                         f"got {height}")
+
+def time_of_impact(dx, dy, move_x, move_y, reach):
+    """Earliest fraction t in [0, 1] of a tick at which two circles come within `reach`, or None
+
+    (dx, dy) is their separation at the start of the tick and (move_x, move_y) their relative
+    displacement over it; motion is treated as linear within the tick.
+    """
+    c = dx * dx + dy * dy - reach * reach
+    if c < 0:
+        return 0.0  # Already overlapping
+    b = 2 * (dx * move_x + dy * move_y)
+    if b >= 0:
+        return None  # Not approaching
+    a = move_x * move_x + move_y * move_y
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / (2 * a)
+    return t if t <= 1 else None
+
+class ObjectType(Enum):
+    ROCK = "rock"
+    PAPER = "paper"
+    SCISSORS = "scissors"
+
+# Object types are stored as small ints; (a - b) % 3 == 1 means a beats b, so (t + 1) % 3 is t's predator
+TYPE_CODES = {ObjectType.ROCK: 0, ObjectType.PAPER: 1, ObjectType.SCISSORS: 2}
+CODE_TYPES = [ObjectType.ROCK, ObjectType.PAPER, ObjectType.SCISSORS]
+
+# Rock beats Scissors, Scissors beats Paper, Paper beats Rock
+BEATS = {
+    ObjectType.ROCK: ObjectType.SCISSORS,
+    ObjectType.SCISSORS: ObjectType.PAPER,
+    ObjectType.PAPER: ObjectType.ROCK,
+}
+
+def resolve_conversions(previous_types, collisions):
+    """Double-buffered conversion stage: map each converted object's index to its next-tick type
+
+    Winners are decided only from `previous_types`, a snapshot frozen before any conversion this
+    tick, and results go into a separate buffer, so the outcome does not depend on the order of
+    `collisions` (pairs may come from any broad phase, split across threads or processes).
+
+    Tie-break rule: an object hit by several attackers in one tick converts once. Each type has
+    exactly one predator, so every attacker that beats a given object has the same type and the
+    majority is always unanimous.
+    """
+    next_types = {}
+    for i, j in collisions:
+        type_i = previous_types[i]
+        type_j = previous_types[j]
+        if BEATS[type_i] is type_j:
+            next_types[j] = type_i
+        elif BEATS[type_j] is type_i:
+            next_types[i] = type_j
+    return next_types
+
+class SimObject:
+    """Compact battle object: slotted, type held as a small int code, no reference back to the simulation
+
+    The arena bounds are passed to update() each tick; live counters are kept by Simulation.convert.
+    """
+    __slots__ = ("code", "x", "y", "vel_x", "vel_y", "radius")
+
+    def __init__(self, obj_type: ObjectType, x: float, y: float, radius=OBJECT_SIZE // 2, vel_x=0.0, vel_y=0.0):
+        self.code = TYPE_CODES[obj_type]
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.vel_x = vel_x
+        self.vel_y = vel_y
+
+    @property
+    def type(self):
+        return CODE_TYPES[self.code]
+
+    def update(self, window_width, window_height):
+        self.x += self.vel_x
+        self.y += self.vel_y
+
+        # Bounce off walls
+        if self.x - self.radius <= 0 or self.x + self.radius >= window_width:
+            self.vel_x = -self.vel_x
+            self.x = max(self.radius, min(window_width - self.radius, self.x))
+
+        if self.y - self.radius <= HEADER_HEIGHT or self.y + self.radius >= window_height:
+            self.vel_y = -self.vel_y
+            self.y = max(HEADER_HEIGHT + self.radius, min(window_height - self.radius, self.y))
+
+    def get_distance(self, other):
+        return math.sqrt(self.get_distance_squared(other))
+
+    def get_distance_squared(self, other):
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return dx * dx + dy * dy
+
+    def collides_with(self, other):
+        # Compare squared distances to avoid a sqrt per pair
+        reach = self.radius + other.radius
+        return self.get_distance_squared(other) < reach * reach
+
+    def convert_to_type(self, new_type: ObjectType):
+        """Convert this object to a different type, keeping position and velocity"""
+        self.code = TYPE_CODES[new_type]
+
+class PopulationHistory:
+    """Fixed-size ring buffer of per-type populations, one entry per tick"""
+    def __init__(self, capacity=POPULATION_HISTORY_TICKS):
+        self.capacity = capacity
+        self.buffers = {obj_type: array("i", [0]) * capacity for obj_type in ObjectType}
+        self.head = 0  # Next slot to write
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, counts):
+        head = self.head
+        for obj_type, buffer in self.buffers.items():
+            buffer[head] = counts[obj_type]
+        self.head = (head + 1) % self.capacity
+        self.length = min(self.length + 1, self.capacity)
+
+    def series(self, obj_type):
+        """Populations of `obj_type`, oldest first"""
+        buffer = self.buffers[obj_type]
+        if self.length < self.capacity:
+            return buffer[:self.length].tolist()
+        return buffer[self.head:].tolist() + buffer[:self.head].tolist()
+
+    def clear(self):
+        self.head = 0
+        self.length = 0
+
+class SpawnScheduler:
+    """Lazy, dt-driven spawner that emits one batch (one object of each type) per SPAWN_INTERVAL
+
+    Positions are only generated when a batch is due, using the arena size at that moment, so
+    nothing is preallocated and any object count works. Every batch holds exactly one object
+    per type whatever the pattern, so the types always stay balanced.
+    """
+    def __init__(self, count=0, pattern=CORNERS, interval=SPAWN_INTERVAL):
+        if pattern not in SPAWN_PATTERNS:
+            raise ValueError(f"unknown spawn pattern {pattern!r}")
+        self.remaining = count  # Batches still to spawn
+        self.pattern = pattern
+        self.interval = interval
+        self.timer = 0.0
+
+    def due(self, dt, simulation):
+        """Yield every batch whose spawn time falls within the next `dt` seconds"""
+        if not self.remaining:
+            return
+        self.timer += dt
+        while self.remaining and self.timer >= self.interval:
+            self.timer -= self.interval
+            self.remaining -= 1
+            yield self.make_batch(simulation)
+
+    def make_batch(self, simulation):
+        rng = simulation.rng
+        width, height, object_size = simulation.width, simulation.height, simulation.object_size
+        batch = []
+        for obj_type, (base_x, base_y) in zip(ObjectType, self.anchors(width, height, rng)):
+            # Add small random offset to prevent overlap
+            x = base_x + rng.randint(-30, 30)
+            y = base_y + rng.randint(-30, 30)
+            # Ensure objects stay within bounds using current window size
+            x = max(object_size, min(width - object_size, x))
+            y = max(HEADER_HEIGHT + 20, min(height - object_size, y))
+            batch.append((obj_type, x, y))
+
+        # Shuffle the order within each batch for visual variety
+        rng.shuffle(batch)
+        return batch
+
+    def anchors(self, width, height, rng):
+        """Base spawn point for rock, paper and scissors, in that order"""
+        if self.pattern == CORNERS:
+            return [
+                (width - 50, HEADER_HEIGHT + 30),  # Rock: top right (below header)
+                (width - 50, height - 50),  # Paper: bottom right
+                (50, height - 50),  # Scissors: bottom left
+            ]
+        # Ranges collapse to their lower end in arenas too small for the margins; make_batch clamps the rest
+        right = max(50, width - 50)
+        bottom = max(HEADER_HEIGHT + 30, height - 50)
+        if self.pattern == EDGES:
+            # Each type enters along its own wall: rock at the top, paper on the right, scissors on the left
+            return [
+                (rng.randint(50, right), HEADER_HEIGHT + 30),
+                (width - 50, rng.randint(HEADER_HEIGHT + 30, bottom)),
+                (50, rng.randint(HEADER_HEIGHT + 30, bottom)),
+            ]
+        return [(rng.randint(50, right), rng.randint(HEADER_HEIGHT + 30, bottom)) for _ in range(3)]
+
+class SpatialHash:
+    """Uniform grid broad phase: only objects in the same or neighboring cells are tested"""
+    def __init__(self, cell_size):
+        # Cells must be at least one object diameter wide so colliding objects are never more than one cell apart
+        self.cell_size = max(1, int(cell_size))
+        self.cells = {}
+        self.object_cells = []
+        self.pairs_yielded = 0
+
+    def rebuild(self, objects):
+        """Re-bucket every object by its current position"""
+        self.cells = {}
+        self.object_cells = []
+        self.pairs_yielded = 0
+        size = self.cell_size
+        for idx, obj in enumerate(objects):
+            key = (int(obj.x // size), int(obj.y // size))
+            self.object_cells.append(key)
+            bucket = self.cells.get(key)
+            if bucket is None:
+                self.cells[key] = [idx]
+            else:
+                bucket.append(idx)
+
+    def candidate_pairs(self):
+        """Yield (i, j) pairs with i < j; each pair once, grouped by i in ascending order"""
+        cells = self.cells
+        for i, (cx, cy) in enumerate(self.object_cells):
+            candidates = []
+            for nx in (cx - 1, cx, cx + 1):
+                for ny in (cy - 1, cy, cy + 1):
+                    bucket = cells.get((nx, ny))
+                    if bucket:
+                        candidates.extend(j for j in bucket if j > i)
+            self.pairs_yielded += len(candidates)
+            for j in candidates:
+                yield i, j
+
+@dataclass
+class SimulationResult:
+    winner: Optional[ObjectType]  # None if the tick limit was hit first
+    ticks: int
+    history: Dict[ObjectType, List[int]] = field(default_factory=dict)  # Population per type after each tick
+    peaks: Dict[ObjectType, int] = field(default_factory=dict)  # Highest population reached per type
+
+class Simulation:
+    """Battle state and rules, stepped one tick at a time with no display attached"""
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT, count=INITIAL_OBJECT_COUNT,
+                 speed=SPEED_PIXELS_PER_FRAME, object_size=None, seed=None,
+                 object_factory=SimObject, record_history=False, collision_mode=DISCRETE,
+                 spawn_pattern=CORNERS):
+        self.count = count
+        self.speed_pixels_per_frame = speed
+        self.fixed_object_size = object_size  # None: derive from the window size
+        self.seed = seed if seed is not None else make_seed()
+        self.rng = random.Random(self.seed)
+        self.object_factory = object_factory
+        self.record_history = record_history
+        self.use_spatial_hash = True
+        self.collision_mode = collision_mode
+        self.start_positions = []  # Positions at the start of the current tick, for swept collisions
+        self.profiler = None  # Optional FrameProfiler; each phase of step() is charged to it
+        self.pairs_tested = 0  # Narrow-phase checks in the last collision pass
+        self.collisions_found = 0
+
+        self.objects: List[SimObject] = []
+        self.spawn_pattern = spawn_pattern
+        self.spawner = SpawnScheduler()
+        self.running = False
+        self.winner = None
+        self.ticks = 0
+        self.history = {obj_type: [] for obj_type in ObjectType}
+
+        # Live populations, kept up to date on spawn and conversion instead of rescanning objects
+        self.counts = dict.fromkeys(ObjectType, 0)
+        self.peak_counts = dict.fromkeys(ObjectType, 0)
+        self.population = PopulationHistory()
+
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        """Update the arena size and everything that depends on it"""
+        self.width = width
+        self.height = height
+        if self.fixed_object_size is not None:
+            self.object_size = self.fixed_object_size
+        else:
+            self.object_size = int(min(width, height) * OBJECT_SIZE_RATIO)
+        self.spatial_hash = SpatialHash(self.object_size)
+
+        # Keep objects within new bounds
+        for obj in self.objects:
+            obj.radius = self.object_size // 2
+            obj.x = max(obj.radius, min(self.width - obj.radius, obj.x))
+            obj.y = max(HEADER_HEIGHT + obj.radius, min(self.height - obj.radius, obj.y))
+
+    def start(self, count=None, seed=None):
+        """Reset the battle and schedule `count` spawn batches of one object per type
+
+        Passing `seed` reseeds the RNG so the battle is reproducible from (seed, parameters) alone.
+        """
+        if count is not None:
+            self.count = count
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.objects.clear()
+        self.spawner = SpawnScheduler(self.count, self.spawn_pattern)
+        self.running = True
+        self.winner = None
+        self.ticks = 0
+        self.history = {obj_type: [] for obj_type in ObjectType}
+        self.counts = dict.fromkeys(ObjectType, 0)
+        self.peak_counts = dict.fromkeys(ObjectType, 0)
+        self.population.clear()
+
+    def step(self, dt):
+        """Advance the battle by one tick; `dt` (seconds) drives the spawn timer"""
+        if not self.running:
+            return
+        profiler = self.profiler
+
+        # Spawn objects; each batch holds one of each type, and a long tick can owe several batches
+        for batch in self.spawner.due(dt, self):
+            for obj_type, x, y in batch:
+                self.add_object(obj_type, x, y)
+        if profiler:
+            profiler.lap("spawn")
+
+        # Update objects
+        if self.collision_mode == SWEPT:
+            self.start_positions = [(obj.x, obj.y) for obj in self.objects]
+        width, height = self.width, self.height
+        for obj in self.objects:
+            obj.update(width, height)
+        if profiler:
+            profiler.lap("movement")
+
+        # Check collisions
+        collisions = self.find_collisions()
+        if profiler:
+            profiler.lap("collision")
+        if self.collision_mode == SWEPT:
+            # Resolve in time-of-impact order so an object converted early in the tick meets later ones with its new type
+            for i, j in collisions:
+                winner_obj, loser_idx = self.determine_winner(self.objects[i], self.objects[j], i, j)
+                if loser_idx is not None:
+                    self.convert(self.objects[loser_idx], winner_obj.type)
+        else:
+            # Decide every conversion from this tick's frozen types before applying any of them
+            previous_types = [obj.type for obj in self.objects]
+            for loser_idx, winner_type in resolve_conversions(previous_types, collisions).items():
+                self.convert(self.objects[loser_idx], winner_type)
+
+        if profiler:
+            profiler.lap("conversion")
+
+        self.finish_tick()
+
+    def add_object(self, obj_type, x, y):
+        # Random direction for movement
+        angle = self.rng.uniform(0, 2 * math.pi)
+        speed = self.speed_pixels_per_frame
+        self.objects.append(self.object_factory(obj_type, x, y, self.object_size // 2,
+                                                math.cos(angle) * speed, math.sin(angle) * speed))
+        self.counts[obj_type] += 1
+
+    def get_object_arrays(self):
+        """Every object as flat typed arrays (type codes, x, y, vel_x, vel_y), e.g. for snapshots"""
+        objects = self.objects
+        return (array("b", [obj.code for obj in objects]),
+                array("d", [obj.x for obj in objects]), array("d", [obj.y for obj in objects]),
+                array("d", [obj.vel_x for obj in objects]), array("d", [obj.vel_y for obj in objects]))
+
+    def set_object_arrays(self, codes, xs, ys, vel_xs, vel_ys):
+        """Replace every object from arrays laid out as get_object_arrays returns them; counters follow"""
+        radius = self.object_size // 2
+        factory = self.object_factory
+        self.objects[:] = [factory(CODE_TYPES[code], x, y, radius, vel_x, vel_y)
+                           for code, x, y, vel_x, vel_y in zip(codes, xs, ys, vel_xs, vel_ys)]
+        codes = list(codes)
+        self.counts = {obj_type: codes.count(code) for code, obj_type in enumerate(CODE_TYPES)}
+
+    def convert(self, obj, new_type):
+        """Convert `obj` and keep the live counters in step"""
+        self.counts[obj.type] -= 1
+        self.counts[new_type] += 1
+        obj.convert_to_type(new_type)
+
+    def finish_tick(self):
+        """Record this tick's populations and check for a winner, all from the live counters"""
+        self.ticks += 1
+        counts = self.counts
+        self.population.append(counts)
+        peaks = self.peak_counts
+        for obj_type, count in counts.items():
+            if count > peaks[obj_type]:
+                peaks[obj_type] = count
+        if self.record_history:
+            for obj_type, count in counts.items():
+                self.history[obj_type].append(count)
+
+        # Check win condition: one type holds the whole population
+        total = self.get_population()
+        if total and not self.spawner.remaining:
+            for obj_type, count in counts.items():
+                if count == total:
+                    self.winner = obj_type
+                    self.running = False
+
+    def run(self, max_ticks=None, dt=TICK_SECONDS):
+        """Step until one type is left (or `max_ticks` is reached) and return the result"""
+        if not self.running and self.winner is None:
+            self.start()
+        while self.running and (max_ticks is None or self.ticks < max_ticks):
+            self.step(dt)
+        return SimulationResult(self.winner, self.ticks, self.history, dict(self.peak_counts))
+
+    def find_collisions(self):
+        """Return colliding (i, j) index pairs, i < j
+
+        Discrete mode results are resolved order-independently, so pairs come in whatever order the
+        broad phase yields them; swept mode orders them by time of impact, ties broken by (i, j).
+        """
+        objects = self.objects
+        if not self.use_spatial_hash:
+            self.pairs_tested = len(objects) * (len(objects) - 1) // 2
+            candidates = ((i, j) for i in range(len(objects)) for j in range(i + 1, len(objects)))
+        else:
+            self.spatial_hash.cell_size = self.broad_phase_cell_size()
+            self.spatial_hash.rebuild(objects)
+            candidates = self.spatial_hash.candidate_pairs()
+
+        if self.collision_mode == SWEPT:
+            starts = self.start_positions
+            impacts = []
+            for i, j in candidates:
+                obj1, obj2 = objects[i], objects[j]
+                (x1, y1), (x2, y2) = starts[i], starts[j]
+                t = time_of_impact(x1 - x2, y1 - y2,
+                                   (obj1.x - x1) - (obj2.x - x2), (obj1.y - y1) - (obj2.y - y2),
+                                   obj1.radius + obj2.radius)
+                if t is not None:
+                    impacts.append((t, i, j))
+            impacts.sort()
+            collisions = [(i, j) for _, i, j in impacts]
+        else:
+            collisions = [(i, j) for i, j in candidates if objects[i].collides_with(objects[j])]
+
+        if self.use_spatial_hash:
+            self.pairs_tested = self.spatial_hash.pairs_yielded
+        self.collisions_found = len(collisions)
+        return collisions
+
+    def broad_phase_cell_size(self):
+        """Grid cell size that keeps every possibly-colliding pair in neighboring cells"""
+        cell_size = self.object_size
+        if self.collision_mode == SWEPT:
+            # End positions of a pair that touched mid-tick can be up to one step each further apart
+            cell_size += math.ceil(2 * self.speed_pixels_per_frame)
+        # Zero-size objects (tiny arenas) still need a nonzero cell to bucket by
+        return max(1, cell_size)
+
+    def determine_winner(self, obj1, obj2, idx1, idx2):
+        # Rock beats Scissors, Scissors beats Paper, Paper beats Rock
+        if obj1.type == obj2.type:
+            return obj1, None  # Same type, no winner
+
+        rules = {
+            (ObjectType.ROCK, ObjectType.SCISSORS): (obj1, idx2),
+            (ObjectType.SCISSORS, ObjectType.PAPER): (obj1, idx2),
+            (ObjectType.PAPER, ObjectType.ROCK): (obj1, idx2),
+            (ObjectType.SCISSORS, ObjectType.ROCK): (obj2, idx1),
+            (ObjectType.PAPER, ObjectType.SCISSORS): (obj2, idx1),
+            (ObjectType.ROCK, ObjectType.PAPER): (obj2, idx1),
+        }
+
+        return rules.get((obj1.type, obj2.type), (obj1, None))
+
+    def get_counts(self):
+        """Current population per type; O(1), read from the live counters"""
+        return dict(self.counts)
+
+    def get_population(self):
+        return sum(self.counts.values())
@@ -0,0 +1,192 @@
+"""Compact binary snapshots of a battle in progress.
+
+A snapshot holds everything needed to continue a battle from the exact
+tick it was taken at: arena and battle parameters, spawn scheduler state,
+RNG state, pause/winner flags, peak and history counters, and every
+object as flat typed arrays. Loading a snapshot into a Simulation (scalar
+or array backend, either way round) resumes the battle bit for bit.
+
+Autosaver takes snapshots periodically. The state is copied into a bytes
+object on the caller's thread at a tick boundary, which is fast, and the
+file is written and synced on a background thread, so the frame loop
+never waits on the disk. Files are replaced atomically, so a crash
+mid-write leaves the previous snapshot intact.
+
+Layout (little-endian):
+    header   "RPSS" u8 version, u32 width, u32 height, f64 speed, i32 object_size (-1: scale with window),
+             u32 count, i64 seed, u8 collision mode, u8 spawn pattern, u8 running, u8 paused,
+             u8 winner (type code, 255: none), u32 ticks, u32 spawns remaining, f64 spawn timer
+    peaks    3 x u32
+    rng      u8 version, 625 x u32 Mersenne Twister state, u8 has gauss, f64 gauss
+    history  u32 ring length, 3 x ring length u32, u32 list length, 3 x list length u32 (record_history)
+    objects  u32 n, n x i8 type code, 4 x n f64 (x, y, vel_x, vel_y)
+"""
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from simulation import CODE_TYPES, COLLISION_MODES, SPAWN_PATTERNS, TYPE_CODES, ObjectType, SpawnScheduler
+
+MAGIC = b"RPSS"
+VERSION = 1
+AUTOSAVE_SECONDS = 30.0
+
+HEADER = struct.Struct("<4sBIIdiIqBBBBBIId")
+PEAKS = struct.Struct("<3I")
+RNG = struct.Struct("<B625IBd")
+LENGTH = struct.Struct("<I")
+NO_WINNER = 0xFF
+
+class SnapshotError(Exception):
+    pass
+
+def pack_values(typecode, values):
+    """Little-endian bytes of an array.array or NumPy array of `typecode` items"""
+    data = array(typecode, bytes(values))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+def dumps(simulation, paused=False):
+    """Encode the simulation's full state; call between ticks"""
+    spawner = simulation.spawner
+    winner = NO_WINNER if simulation.winner is None else TYPE_CODES[simulation.winner]
+    object_size = -1 if simulation.fixed_object_size is None else simulation.fixed_object_size
+    parts = [
+        HEADER.pack(MAGIC, VERSION, simulation.width, simulation.height, simulation.speed_pixels_per_frame,
+                    object_size, simulation.count, simulation.seed, COLLISION_MODES.index(simulation.collision_mode),
+                    SPAWN_PATTERNS.index(spawner.pattern), simulation.running, paused, winner, simulation.ticks,
+                    spawner.remaining, spawner.timer),
+        PEAKS.pack(*(simulation.peak_counts[obj_type] for obj_type in CODE_TYPES)),
+    ]
+
+    rng_version, state, gauss = simulation.rng.getstate()
+    parts.append(RNG.pack(rng_version, *state, gauss is not None, gauss or 0.0))
+
+    population = simulation.population
+    parts.append(LENGTH.pack(len(population)))
+    parts.extend(pack_values("I", array("I", population.series(obj_type))) for obj_type in CODE_TYPES)
+    history = simulation.history if simulation.record_history else dict.fromkeys(ObjectType, [])
+    parts.append(LENGTH.pack(len(history[ObjectType.ROCK])))
+    parts.extend(pack_values("I", array("I", history[obj_type])) for obj_type in CODE_TYPES)
+
+    codes, *columns = simulation.get_object_arrays()
+    parts.append(LENGTH.pack(len(codes)))
+    parts.append(pack_values("b", codes))
+    parts.extend(pack_values("d", column) for column in columns)
+    return b"".join(parts)
+
+class Reader:
+    """Sequential reader over snapshot bytes that fails cleanly on truncation"""
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def take(self, size):
+        if self.offset + size > len(self.data):
+            raise SnapshotError("truncated snapshot")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, record):
+        return record.unpack(self.take(record.size))
+
+    def values(self, typecode, count):
+        values = array(typecode)
+        values.frombytes(self.take(count * values.itemsize))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+def loads(data, simulation):
+    """Restore `simulation` in place to the state encoded in `data`; returns the saved pause flag"""
+    reader = Reader(data)
+    (magic, version, width, height, speed, object_size, count, seed, collision_mode, pattern, running, paused,
+     winner, ticks, remaining, timer) = reader.unpack(HEADER)
+    if magic != MAGIC:
+        raise SnapshotError("not a snapshot file")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+
+    # Parameters first, then start() resets everything else before the saved values go back in
+    simulation.speed_pixels_per_frame = speed
+    simulation.fixed_object_size = None if object_size < 0 else object_size
+    simulation.collision_mode = COLLISION_MODES[collision_mode]
+    simulation.spawn_pattern = SPAWN_PATTERNS[pattern]
+    simulation.resize(width, height)
+    simulation.start(count, seed)
+
+    simulation.running = bool(running)
+    simulation.winner = None if winner == NO_WINNER else CODE_TYPES[winner]
+    simulation.ticks = ticks
+    simulation.spawner = SpawnScheduler(remaining, simulation.spawn_pattern)
+    simulation.spawner.timer = timer
+    simulation.peak_counts = dict(zip(CODE_TYPES, reader.unpack(PEAKS)))
+
+    rng_version, *state, has_gauss, gauss = reader.unpack(RNG)
+    simulation.rng.setstate((rng_version, tuple(state), gauss if has_gauss else None))
+
+    (length,) = reader.unpack(LENGTH)
+    series = [reader.values("I", length) for _ in CODE_TYPES]
+    for counts in zip(*series):
+        simulation.population.append(dict(zip(CODE_TYPES, counts)))
+    (length,) = reader.unpack(LENGTH)
+    simulation.history = {obj_type: reader.values("I", length).tolist() for obj_type in CODE_TYPES}
+
+    (n,) = reader.unpack(LENGTH)
+    codes = reader.values("b", n)
+    simulation.set_object_arrays(codes, *(reader.values("d", n) for _ in range(4)))
+    return bool(paused)
+
+def save(path, simulation, paused=False):
+    write_atomic(path, dumps(simulation, paused))
+
+def load(path, simulation):
+    """Restore `simulation` from the snapshot at `path`; returns the saved pause flag"""
+    with open(path, "rb") as f:
+        return loads(f.read(), simulation)
+
+def write_atomic(path, data):
+    """Write to a temporary file and rename it over `path`, so readers never see a partial snapshot"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class Autosaver:
+    """Saves a snapshot every `interval` seconds; only the in-memory copy happens on the caller's thread"""
+    def __init__(self, path, interval=AUTOSAVE_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self.pending = None  # Future of the write in flight, if any
+        self.last_save = time.monotonic()
+
+    def maybe_save(self, simulation, paused=False):
+        """Save if the interval has passed and the previous write finished; returns whether it saved"""
+        if time.monotonic() - self.last_save < self.interval:
+            return False
+        if self.pending:
+            if not self.pending.done():
+                return False
+            self.pending.result()  # Surface a failed write instead of silently losing checkpoints
+        self.save(simulation, paused)
+        return True
+
+    def save(self, simulation, paused=False):
+        self.last_save = time.monotonic()
+        self.pending = self.executor.submit(write_atomic, self.path, dumps(simulation, paused))
+
+    def close(self, simulation=None, paused=False):
+        """Optionally take one final snapshot, then wait for every write to reach the disk"""
+        if simulation is not None:
+            self.save(simulation, paused)
+        self.executor.shutdown(wait=True)
+        if self.pending:
+            self.pending.result()
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from game import RESIZE_SETTLE_MS, Game
+from replay import play_headless
+from simulation import TICK_SECONDS
+
+def click(game, button):
+    for event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        game.handle_event(pygame.event.Event(event_type, pos=button.rect.center, button=1))
+
+def resize(game, width, height):
+    game.handle_event(pygame.event.Event(pygame.VIDEORESIZE, w=width, h=height, size=(width, height)))
+    game.resize_requested_at -= RESIZE_SETTLE_MS  # Let the drag settle without waiting for the wall clock
+
+def play_frames(game, frames, frame_dt=TICK_SECONDS):
+    for _ in range(frames):
+        game.apply_pending_resize()
+        game.advance(frame_dt)
+        game.draw()
+
+def test_replay_reproduces_recorded_session(tmp_path):
+    path = str(tmp_path / "session.rpsr")
+    game = Game(record_path=path)
+    try:
+        game.object_count_control.value = 10
+        click(game, game.new_game_button)
+        play_frames(game, 90)
+        # The battle that counts starts here, so the pause and resize below shape the final state
+        click(game, game.new_game_button)
+        play_frames(game, 40)
+        click(game, game.pause_button)
+        play_frames(game, 30)
+        click(game, game.pause_button)
+        resize(game, 900, 650)
+        play_frames(game, 60, frame_dt=0.025)  # Slow frames owe a varying number of ticks each
+        play_frames(game, 60)
+        game.recorder.close()
+
+        simulation = game.simulation
+        assert (simulation.width, simulation.height) == (900, 650)
+        expected = [column.tolist() for column in simulation.get_object_arrays()]
+        ticks = simulation.ticks
+    finally:
+        pygame.quit()
+
+    replayed = play_headless(path)
+    assert (replayed.width, replayed.height) == (900, 650)
+    assert replayed.ticks == ticks
+    assert [column.tolist() for column in replayed.get_object_arrays()] == expected
+    assert len(expected[0]) == 30
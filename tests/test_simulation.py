@@ -0,0 +1,99 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from array_simulation import ArraySimulation
+from simulation import COLLISION_MODES, DISCRETE, SWEPT, TYPE_CODES, ObjectType, Simulation, resolve_conversions
+
+SEEDS = [0, 1, 2, 3]
+
+def pair_set(pairs):
+    return {tuple(sorted(pair)) for pair in pairs}
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spatial_hash_finds_same_collisions_as_brute_force(seed):
+    simulation = Simulation(count=40, seed=seed)
+    simulation.start()
+    found = 0
+    for _ in range(300):
+        simulation.step(1 / 60)
+        if not simulation.running:
+            break
+        simulation.use_spatial_hash = False
+        brute_force = pair_set(simulation.find_collisions())
+        simulation.use_spatial_hash = True
+        assert pair_set(simulation.find_collisions()) == brute_force
+        found += len(brute_force)
+    assert found  # The comparison is only meaningful if objects actually met
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spatial_hash_gives_same_outcome_as_brute_force(seed):
+    results = []
+    for use_spatial_hash in (True, False):
+        simulation = Simulation(count=40, seed=seed)
+        simulation.use_spatial_hash = use_spatial_hash
+        result = simulation.run(max_ticks=20000)
+        results.append((result.winner, result.ticks))
+    assert results[0] == results[1]
+
+def object_columns(simulation):
+    return [column.tolist() for column in simulation.get_object_arrays()]
+
+@pytest.mark.parametrize("collision_mode", COLLISION_MODES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_array_backend_matches_scalar_backend(seed, collision_mode):
+    scalar = Simulation(count=40, seed=seed, collision_mode=collision_mode)
+    vectorized = ArraySimulation(count=40, seed=seed, collision_mode=collision_mode)
+    for simulation in (scalar, vectorized):
+        simulation.start()
+    for _ in range(600):
+        scalar.step(1 / 60)
+        vectorized.step(1 / 60)
+        assert object_columns(vectorized) == object_columns(scalar)
+        if not scalar.running:
+            break
+
+    results = [simulation.run(max_ticks=20000) for simulation in (scalar, vectorized)]
+    assert results[0].winner is not None
+    assert (results[1].winner, results[1].ticks, results[1].peaks) == (results[0].winner, results[0].ticks, results[0].peaks)
+    assert object_columns(vectorized) == object_columns(scalar)
+
+@pytest.mark.parametrize("simulation_class", [Simulation, ArraySimulation])
+@pytest.mark.parametrize("collision_mode, converted", [(SWEPT, True), (DISCRETE, False)])
+def test_swept_collisions_catch_objects_that_pass_through_each_other(simulation_class, collision_mode, converted):
+    # Head-on at 30 px per tick each with 10 px objects: 31 px apart before the tick, 29 px apart (crossed) after it
+    simulation = simulation_class(count=0, speed=30, object_size=10, collision_mode=collision_mode)
+    simulation.start()
+    codes = [TYPE_CODES[ObjectType.ROCK], TYPE_CODES[ObjectType.SCISSORS]]
+    simulation.set_object_arrays(codes, [400.0, 431.0], [400.0, 400.0], [30.0, -30.0], [0.0, 0.0])
+    simulation.step(1 / 60)
+    codes, xs, *_ = simulation.get_object_arrays()
+    assert xs.tolist() == [430.0, 401.0]
+    assert codes.tolist() == ([TYPE_CODES[ObjectType.ROCK]] * 2 if converted else
+                              [TYPE_CODES[ObjectType.ROCK], TYPE_CODES[ObjectType.SCISSORS]])
+    assert (simulation.winner is ObjectType.ROCK) == converted
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_conversions_do_not_depend_on_collision_order(seed):
+    simulation = Simulation(count=60, seed=seed)
+    simulation.start()
+    rng = random.Random(seed)
+    converted = 0
+    for _ in range(300):
+        simulation.step(1 / 60)
+        if not simulation.running:
+            break
+        previous_types = [obj.type for obj in simulation.objects]
+        collisions = list(simulation.find_collisions())
+        expected = resolve_conversions(previous_types, collisions)
+        for _ in range(5):
+            rng.shuffle(collisions)
+            # Either object of a pair may come first too
+            shuffled = [(j, i) if rng.random() < 0.5 else (i, j) for i, j in collisions]
+            assert resolve_conversions(previous_types, shuffled) == expected
+        converted += len(expected)
+    assert converted
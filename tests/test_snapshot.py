@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot
+from simulation import Simulation
+
+@pytest.mark.parametrize("seed", [0, -3, (1 << 63) - 1, -(1 << 63)])
+def test_restored_battle_resumes_exactly(seed):
+    original = Simulation(width=2000, height=1500, count=20, seed=seed, record_history=True)
+    original.run(max_ticks=150)
+    data = snapshot.dumps(original, paused=True)
+
+    restored = Simulation(record_history=True)
+    assert snapshot.loads(data, restored) is True
+    assert restored.seed == seed and (restored.width, restored.height) == (2000, 1500)
+
+    original.run(max_ticks=600)
+    restored.run(max_ticks=600)
+    assert restored.get_object_arrays() == original.get_object_arrays()
+    assert (restored.ticks, restored.winner, restored.peak_counts) == (original.ticks, original.winner, original.peak_counts)
+    assert restored.history == original.history
@@ -0,0 +1,31 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tournament import read_finished, run_tournament
+
+BATTLES = [
+    {"seed": seed, "count": 3, "width": 1024, "height": 768, "speed": 3.2, "object_size": None,
+     "collision_mode": "discrete", "spawn_pattern": "corners", "max_ticks": 20000, "backend": "scalar"}
+    for seed in range(3)
+]
+
+@pytest.mark.parametrize("extension", ["jsonl", "csv"])
+def test_resume_replaces_half_written_last_row(tmp_path, extension):
+    output = str(tmp_path / f"results.{extension}")
+    run_tournament(BATTLES[:2], output, workers=1)
+    with open(output, "rb+") as f:
+        data = f.read()
+        f.truncate(len(data) - 20)  # Crash in the middle of the last row
+
+    run_tournament(BATTLES, output, workers=1, resume=True)
+    assert len(read_finished(output)) == len(BATTLES)
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f)) if extension == "csv" else [json.loads(line) for line in f]
+    assert sorted(int(row["seed"]) for row in rows) == [0, 1, 2]
+    assert all(row["peak_scissors"] not in (None, "") for row in rows)
@@ -0,0 +1,230 @@
+"""Batch tournament runner.
+
+Runs many seeded battles across a process pool and streams each finished
+battle to a JSONL or CSV file as it completes. Re-running with --resume
+skips battles already present in the output file, so an interrupted sweep
+picks up where it stopped.
+
+Example:
+    python tournament.py --counts 10 50 200 --sizes 1024x768 1600x600 --seeds 100 -o results.jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import snapshot
+from simulation import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, SPEED_PIXELS_PER_FRAME, TICK_SECONDS, CORNERS, DISCRETE, SPAWN_PATTERNS, SWEPT,
+    ObjectType, Simulation, check_arena,
+)
+
+FIELDS = ["seed", "count", "width", "height", "speed", "object_size", "collision_mode", "spawn_pattern",
+          "winner", "ticks", "peak_rock", "peak_paper", "peak_scissors"]
+KEY_FIELDS = ("seed", "count", "width", "height", "speed", "object_size", "collision_mode", "spawn_pattern")
+KEY_DEFAULTS = {"collision_mode": DISCRETE, "spawn_pattern": CORNERS}  # For rows written before the field existed
+STDOUT = "-"  # Output path that streams JSONL to standard output
+PROGRESS_TICKS = 100
+
+def run_battle(params, progress=None, checkpoint=None, resume=False):
+    """Play one headless battle and return a flat result row
+
+    `progress`, if given, is called with the simulation every PROGRESS_TICKS ticks. `checkpoint`, a
+    snapshot.Autosaver, snapshots the battle as it runs and once more when it ends; with `resume`, an
+    existing checkpoint file is continued instead, and the row reports the parameters it was saved with.
+    """
+    simulation_class = Simulation
+    if params.get("backend") == "array":
+        from array_simulation import ArraySimulation
+        simulation_class = ArraySimulation
+
+    simulation = simulation_class(params["width"], params["height"], params["count"], params["speed"],
+                                  params["object_size"], params["seed"], collision_mode=params["collision_mode"],
+                                  spawn_pattern=params["spawn_pattern"])
+    if resume and checkpoint and os.path.exists(checkpoint.path):
+        snapshot.load(checkpoint.path, simulation)
+        params = dict(params, seed=simulation.seed, count=simulation.count, width=simulation.width,
+                      height=simulation.height, speed=simulation.speed_pixels_per_frame,
+                      object_size=simulation.fixed_object_size, collision_mode=simulation.collision_mode,
+                      spawn_pattern=simulation.spawn_pattern)
+    if progress or checkpoint:
+        if not simulation.running and simulation.winner is None:
+            simulation.start()
+        try:
+            while simulation.running and simulation.ticks < params["max_ticks"]:
+                simulation.step(TICK_SECONDS)
+                if simulation.ticks % PROGRESS_TICKS == 0:
+                    if progress:
+                        progress(simulation)
+                    if checkpoint:
+                        checkpoint.maybe_save(simulation)
+        except BaseException:
+            if checkpoint:
+                checkpoint.close()  # Interrupted mid-tick: keep the last consistent snapshot
+            raise
+    result = simulation.run(max_ticks=params["max_ticks"])
+    if checkpoint:
+        checkpoint.close(simulation)
+
+    row = {key: params[key] for key in KEY_FIELDS}
+    row["winner"] = result.winner.value if result.winner else None
+    row["ticks"] = result.ticks
+    for obj_type in ObjectType:
+        row[f"peak_{obj_type.value}"] = result.peaks[obj_type]
+    return row
+
+def normalize(value):
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def battle_key(row):
+    """Identify a battle by its parameters; values are normalized so CSV strings match"""
+    return tuple(normalize(row.get(key, KEY_DEFAULTS.get(key))) for key in KEY_FIELDS)
+
+def read_finished(path):
+    """Return the keys of battles already recorded in `path`"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            # A crash can leave a half-written last line; ignore it so the battle is re-run
+            rows = []
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+    return {battle_key(row) for row in rows}
+
+def trim_partial_line(path):
+    """Cut a half-written last row (left by a crash) so appended rows start on a fresh line"""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+class ResultWriter:
+    """Append-only JSONL/CSV sink that flushes after every row; STDOUT streams JSONL to standard output"""
+    def __init__(self, path):
+        self.is_csv = path.endswith(".csv")
+        write_header = self.is_csv and (not os.path.exists(path) or os.path.getsize(path) == 0)
+        self.file = sys.stdout if path == STDOUT else open(path, "a", newline="")
+        if self.is_csv:
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, row):
+        if self.is_csv:
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return positive_int(width), positive_int(height)
+
+def build_battles(args):
+    battles = []
+    for count, (width, height), seed in itertools.product(args.counts, args.sizes, range(args.first_seed, args.first_seed + args.seeds)):
+        battles.append({
+            "seed": seed, "count": count, "width": width, "height": height,
+            "speed": args.speed, "object_size": args.object_size, "collision_mode": args.collisions,
+            "spawn_pattern": args.spawn_pattern,
+            "max_ticks": args.max_ticks, "backend": args.backend,
+        })
+    return battles
+
+def run_tournament(battles, output, workers=None, resume=False, progress=None):
+    """Run `battles` on a process pool, streaming rows to `output`; returns the number of battles run"""
+    if output == STDOUT:
+        if resume:
+            raise ValueError("can't resume a sweep streamed to stdout")
+    elif resume:
+        if os.path.exists(output):
+            trim_partial_line(output)
+        finished = read_finished(output)
+        battles = [battle for battle in battles if battle_key(battle) not in finished]
+    elif os.path.exists(output):
+        os.remove(output)
+
+    writer = ResultWriter(output)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_battle, battle) for battle in battles]
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    row = future.result()
+                    writer.write(row)
+                    if progress:
+                        progress(done, len(battles), row)
+            except BaseException:
+                # Drop queued battles instead of running them to completion only to discard their rows;
+                # rows already written stay in the output for --resume
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        writer.close()
+    return len(battles)
+
+def add_sweep_arguments(parser):
+    parser.add_argument("--counts", type=positive_int, nargs="+", default=[50], help="objects per type")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(WINDOW_WIDTH, WINDOW_HEIGHT)],
+                        help="arena sizes as WIDTHxHEIGHT")
+    parser.add_argument("--seeds", type=positive_int, default=10, help="battles per parameter combination")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=SPEED_PIXELS_PER_FRAME, help="pixels per tick")
+    parser.add_argument("--object-size", type=positive_int, default=None, help="pixels; default scales with the arena")
+    parser.add_argument("--max-ticks", type=positive_int, default=100000, help="give up on a battle after this many ticks")
+    parser.add_argument("--collisions", choices=[DISCRETE, SWEPT], default=DISCRETE,
+                        help="swept collisions stay correct at high speeds")
+    parser.add_argument("--spawn-pattern", choices=SPAWN_PATTERNS, default=CORNERS)
+    parser.add_argument("--backend", choices=["scalar", "array"], default="scalar")
+    parser.add_argument("--workers", type=positive_int, default=None, help="default: one per core")
+
+def check_sweep_arguments(parser, args):
+    """Reject combinations of sweep options that can't be checked one argument at a time"""
+    if args.resume and args.output == STDOUT:
+        parser.error("--resume needs --output: results streamed to stdout can't be read back")
+    for width, height in args.sizes:
+        try:
+            check_arena(width, height, args.object_size)
+        except ValueError as e:
+            parser.error(f"--sizes {width}x{height}: {e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a sweep of seeded headless battles in parallel")
+    add_sweep_arguments(parser)
+    parser.add_argument("-o", "--output", default="results.jsonl", help=".jsonl or .csv; - for JSONL on stdout")
+    parser.add_argument("--resume", action="store_true", help="skip battles already in the output file")
+    args = parser.parse_args(argv)
+    check_sweep_arguments(parser, args)
+
+    def progress(done, total, row):
+        print(f"\r{done}/{total} battles", end="", file=sys.stderr, flush=True)
+
+    run = run_tournament(build_battles(args), args.output, args.workers, args.resume, progress)
+    print(f"\n{run} battles written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()